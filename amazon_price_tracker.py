@@ -4,7 +4,7 @@
 #   Windows: Double-click this file (or run: python amazon_price_tracker.py)
 #   Mac/Linux: Run: python3 amazon_price_tracker.py
 
-import os, sys, subprocess
+import os, sys, subprocess, functools, re
 
 # ============================================================
 # AUTO-INSTALLER — Runs once on first launch, then skips
@@ -14,6 +14,7 @@ import os, sys, subprocess
 # Works from both .py scripts AND frozen EXEs
 # ============================================================
 _SETUP_MARKER = '.playwright_installed'
+_DEPS_MARKER = '.deps_installed'  # Holds the pip names verified last launch; re-checked when the list changes
 
 def _ensure_dependencies():
     """Check for and install all required packages automatically."""
@@ -28,13 +29,23 @@ def _ensure_dependencies():
             'requests': 'requests',
             'pystray': 'pystray',
             'PIL': 'Pillow',
+            'selectolax': 'selectolax',
+            'waitress': 'waitress',
+            'orjson': 'orjson',
         }
+        deps_key = ','.join(sorted(required.values()))
+        try:
+            with open(_DEPS_MARKER) as f:
+                deps_ok = f.read().strip() == deps_key
+        except OSError:
+            deps_ok = False
+        
+        # One pass over installed distributions instead of importing every package
         missing = []
-        for import_name, pip_name in required.items():
-            try:
-                __import__(import_name)
-            except ImportError:
-                missing.append(pip_name)
+        if not deps_ok:
+            import importlib.metadata
+            have = {_normalize_dist_name(d.metadata['Name'] or '') for d in importlib.metadata.distributions()}
+            missing = [pip_name for pip_name in required.values() if _normalize_dist_name(pip_name) not in have]
         
         if missing:
             _safe_print(f"[Setup] Installing {', '.join(missing)}...")
@@ -51,6 +62,13 @@ def _ensure_dependencies():
                 except subprocess.CalledProcessError:
                     _safe_print(f"[Setup] ERROR: pip install failed. Run: pip install {' '.join(missing)}")
                     sys.exit(1)
+        
+        if not deps_ok:
+            try:
+                with open(_DEPS_MARKER, 'w') as f:
+                    f.write(deps_key)
+            except OSError:
+                pass
     
     # For BOTH .py and EXE: ensure Playwright + Chromium are installed
     # Skip if we already did this successfully (marker file)
@@ -59,6 +77,10 @@ def _ensure_dependencies():
     
     _install_playwright(is_frozen)
 
+def _normalize_dist_name(name):
+    """PEP 503 style name normalization so 'Pillow' matches 'pillow' and '_' matches '-'."""
+    return re.sub(r'[-_.]+', '-', name).lower()
+
 def _install_playwright(is_frozen):
     """Install Playwright + Chromium browser. Works from .py or EXE."""
     # Find a working Python executable on the system
@@ -86,18 +108,10 @@ def _install_playwright(is_frozen):
             _log_setup("Could not install Playwright - screenshots will use requests fallback")
             return
     
-    # Step 2: Ensure Chromium browser is installed
-    try:
-        subprocess.run(
-            [python_cmd, '-c', 
-             'from playwright.sync_api import sync_playwright\n'
-             'with sync_playwright() as p:\n'
-             '  b = p.chromium.launch(headless=True)\n'
-             '  b.close()'],
-            capture_output=True, timeout=30
-        ).check_returncode()
+    # Step 2: Ensure Chromium browser is installed (directory check — no browser launch)
+    if _chromium_installed(python_cmd):
         _log_setup("Playwright + Chromium verified.")
-    except Exception:
+    else:
         _log_setup("Installing Chromium browser (one-time, takes ~1-2 minutes)...")
         try:
             subprocess.run(
@@ -116,8 +130,40 @@ def _install_playwright(is_frozen):
     except Exception:
         pass
 
+def _playwright_browsers_dir(python_cmd):
+    """Where Playwright keeps downloaded browsers for python_cmd (honors PLAYWRIGHT_BROWSERS_PATH)."""
+    custom = os.environ.get('PLAYWRIGHT_BROWSERS_PATH')
+    if custom and custom != '0':
+        return custom
+    if custom == '0':
+        # Browsers are stored inside the playwright package of the target interpreter
+        try:
+            result = subprocess.run(
+                [python_cmd, '-c', 'import os, playwright; print(os.path.dirname(playwright.__file__))'],
+                capture_output=True, timeout=10, text=True
+            )
+            if result.returncode == 0:
+                return os.path.join(result.stdout.strip(), 'driver', 'package', '.local-browsers')
+        except Exception:
+            pass
+        return None
+    if sys.platform == 'win32':
+        return os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'ms-playwright')
+    if sys.platform == 'darwin':
+        return os.path.expanduser('~/Library/Caches/ms-playwright')
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'ms-playwright')
+
+def _chromium_installed(python_cmd):
+    """Cheap check for a downloaded Chromium build — avoids spawning a browser just to probe."""
+    browsers_dir = _playwright_browsers_dir(python_cmd)
+    try:
+        return bool(browsers_dir) and any(name.startswith('chromium') for name in os.listdir(browsers_dir))
+    except OSError:
+        return False
+
+@functools.lru_cache(maxsize=1)
 def _find_system_python():
-    """Find a working Python 3 executable on the system PATH."""
+    """Find a working Python 3 executable on the system PATH (result cached for the process)."""
     import shutil
     # Try common names in order of preference
     for name in ['python', 'python3', 'py']:
@@ -161,21 +207,69 @@ if __name__ == "__main__":
 # ============================================================
 # IMPORTS (all safe now — dependencies guaranteed above)
 # ============================================================
-import time, random, threading, smtplib, re, signal, logging, json, asyncio, sqlite3, webbrowser, imaplib, requests
+import time, random, threading, queue, smtplib, re, signal, logging, json, asyncio, sqlite3, webbrowser, imaplib, atexit, zlib, hashlib, gzip
 import email as email_lib  # Renamed to avoid conflicts
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.image import MIMEImage
 from email.header import decode_header
 from email.utils import parsedate_to_datetime
+from email.parser import BytesHeaderParser
 from datetime import datetime, timedelta
 from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
 from urllib.parse import unquote, quote
 from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
-from flask import Flask, render_template_string, request, redirect, flash, send_from_directory, jsonify
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text
-from sqlalchemy.orm import declarative_base, sessionmaker, scoped_session
-from bs4 import BeautifulSoup
+for _attempt in range(2):
+    try:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        from flask import Flask, render_template, request, redirect, flash, send_from_directory, jsonify, stream_with_context, get_flashed_messages, session
+        from sqlalchemy import create_engine, event, Index, Column, Integer, String, Float, DateTime, Boolean, Text, or_
+        from sqlalchemy.orm import declarative_base, sessionmaker
+        from sqlalchemy.pool import QueuePool
+        from jinja2 import DictLoader, FileSystemBytecodeCache
+        from markupsafe import Markup
+        from bs4 import BeautifulSoup
+        break
+    except ImportError:
+        if _attempt or __name__ != "__main__" or getattr(sys, 'frozen', False): raise
+        # .deps_installed outlived an uninstall or a rebuilt venv: drop it and run the real check
+        try: os.remove(_DEPS_MARKER)
+        except OSError: pass
+        _ensure_dependencies()
+        import importlib; importlib.invalidate_caches()
+
+try:
+    from selectolax.parser import HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from fast_mail_parser import parse_email as fast_parse_email
+    FAST_MAIL_PARSER_AVAILABLE = True
+except ImportError:
+    FAST_MAIL_PARSER_AVAILABLE = False
+
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+try:
+    from waitress import serve as waitress_serve
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
 
 try:
     from playwright.async_api import async_playwright
@@ -190,6 +284,10 @@ try:
 except ImportError:
     TRAY_AVAILABLE = False
 
+# orjson when installed: several times faster on the price-history lists than stdlib json
+json_dumps = (lambda obj: orjson.dumps(obj).decode()) if ORJSON_AVAILABLE else json.dumps
+json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
 DB_NAME = 'tracker.db'
 APP_VERSION = 33
 GITHUB_REPO = 'steve-vogt/amazon-price-tracker'
@@ -198,6 +296,7 @@ ALERT_COOLDOWN_HOURS = 12
 DEFAULT_EXPIRATION_DAYS = 35
 MAX_PRICE_HISTORY = 90
 SCRAPE_TIMEOUT = 90
+CYCLE_COMMIT_EVERY = 10  # Scraped products per commit (one fsync) during a check cycle
 DEFAULT_INTERVAL_MINUTES = 180
 INTERVAL_JITTER_MINUTES = 45
 DEFAULT_PORT = 8088  # Avoids macOS AirPlay conflict on port 5000
@@ -211,48 +310,163 @@ if getattr(sys, 'frozen', False):
 else:
     logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
 logger = logging.getLogger(__name__)
-executor = ThreadPoolExecutor(max_workers=2)
+SCRAPE_WORKERS = int(os.environ.get('TRACKER_WORKERS', 32))
+AMAZON_CONCURRENCY = 4  # Max simultaneous scrapes against amazon.com — more looks like a bot
+executor = ThreadPoolExecutor(max_workers=SCRAPE_WORKERS, thread_name_prefix='scrape')
+# Bulk scrapes: sized to the Amazon limit, so waiting ASINs queue here instead of holding executor workers
+amazon_executor = ThreadPoolExecutor(max_workers=AMAZON_CONCURRENCY, thread_name_prefix='amazon')
+# Leaf HTTP requests (offers page, openFDA) that never wait on other futures
+http_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='http')
+OFFERS_TIMEOUT = 45  # Overall wait for the offers page; HTTP.get's timeout only bounds each socket read
+FDA_TIMEOUT = 30  # Overall wait per openFDA endpoint query
+
+# Shared HTTP session — keeps TCP/TLS connections alive across scrapes, recall lookups and update checks
+HTTP_POOL_SIZE = SCRAPE_WORKERS
+BROWSER_UA = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
+HTTP = requests.Session()
+_http_adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=Retry(total=2, backoff_factor=0.3))
+HTTP.mount('https://', _http_adapter)
+HTTP.mount('http://', _http_adapter)
+HTTP.headers.update({'User-Agent': BROWSER_UA, 'Accept-Encoding': 'gzip, deflate'})
+# GitHub API: small dedicated pool that also retries transient gateway errors (Amazon 503s are blocks, not retried)
+HTTP.mount('https://api.github.com/', HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=Retry(
+    total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=frozenset(['GET']))))
 
 # ============================================================
 # UPDATE CHECKER — Checks GitHub for newer versions
 # ============================================================
-_latest_version_cache = {'version': None, 'url': None, 'checked': None}
+# Install directory (EXE or script location) — stable even before __main__ chdirs there
+_app_dir = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.path.dirname(os.path.abspath(__file__))
+UPDATE_CHECK_FILE = os.path.join(_app_dir, '.update_check.json')
+UPDATE_CHECK_TTL = 86400  # Only ask GitHub once per day, across restarts
+# 'checked' / 'retry_at' are time.monotonic() values; the file stores wall-clock 'ts'
+# 'release' is one (version, url) tuple so readers never see a new version paired with an old URL
+_latest_version_cache = {'release': (None, None), 'checked': None, 'etag': None, 'last_modified': None, 'failures': 0, 'retry_at': None}
+RELEASE_TAG_RE = re.compile(rb'"tag_name"\s*:\s*"([^"\\]+)"')
+_update_lock = threading.Lock()  # Worker thread writes, request threads read
+_update_future = None
+
+def _load_update_cache():
+    """Restore the last update check from disk so a restart doesn't re-hit GitHub within the TTL."""
+    try:
+        with open(UPDATE_CHECK_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        _latest_version_cache.update(release=(data.get('version'), data.get('url')), etag=data.get('etag'),
+                                     last_modified=data.get('last_modified'), checked=time.monotonic() - (time.time() - data['ts']))
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+def _save_update_cache():
+    try:
+        with open(UPDATE_CHECK_FILE, 'w', encoding='utf-8') as f:
+            remote_ver, url = _latest_version_cache['release']
+            json.dump({'ts': time.time() - (time.monotonic() - _latest_version_cache['checked']), 'version': remote_ver,
+                       'url': url, 'etag': _latest_version_cache['etag'],
+                       'last_modified': _latest_version_cache['last_modified']}, f)
+    except OSError:
+        pass
+
+_load_update_cache()
+
+def _update_check_stale():
+    now = time.monotonic()
+    retry_at = _latest_version_cache['retry_at']
+    if retry_at and now < retry_at:
+        return False
+    checked = _latest_version_cache['checked']
+    return checked is None or now - checked >= UPDATE_CHECK_TTL
+
+def _update_result():
+    """(version, url) if the cached release is newer than this build, else (None, None)."""
+    remote_ver, url = _latest_version_cache['release']
+    if remote_ver and remote_ver > APP_VERSION:
+        return remote_ver, url
+    return None, None
+
+def _schedule_update_retry(headers=None):
+    """Back off exponentially after a rate limit / server / network error, honoring GitHub's hints."""
+    with _update_lock:
+        _latest_version_cache['failures'] += 1
+        delay = min(2 ** _latest_version_cache['failures'] * 60, UPDATE_CHECK_TTL)
+        headers = headers or {}
+        try:
+            if headers.get('Retry-After'):
+                delay = max(delay, int(headers['Retry-After']))
+            elif headers.get('X-RateLimit-Remaining') == '0' and headers.get('X-RateLimit-Reset'):
+                delay = max(delay, int(headers['X-RateLimit-Reset']) - time.time())
+        except ValueError:
+            pass
+        _latest_version_cache['retry_at'] = time.monotonic() + delay
 
 def check_for_updates():
     """Check GitHub for a newer version. Returns (latest_version, download_url) or (None, None)."""
     if not GITHUB_REPO:
         return None, None
     # Only check once per day
-    if _latest_version_cache['checked'] and (datetime.now() - _latest_version_cache['checked']).total_seconds() < 86400:
-        return _latest_version_cache['version'], _latest_version_cache['url']
+    if not _update_check_stale():
+        return _update_result()
+    headers = {'Accept': 'application/vnd.github.v3+json', 'User-Agent': f'{APP_NAME}/{APP_VERSION}'}
+    if _latest_version_cache['etag']:
+        headers['If-None-Match'] = _latest_version_cache['etag']  # 304 = unchanged, no body to download
+    if _latest_version_cache['last_modified']:
+        headers['If-Modified-Since'] = _latest_version_cache['last_modified']
     try:
-        resp = requests.get(
+        resp = HTTP.get(
             f'https://api.github.com/repos/{GITHUB_REPO}/releases/latest',
             timeout=10,
-            headers={'Accept': 'application/vnd.github.v3+json'}
+            headers=headers
         )
+    except Exception:
+        _schedule_update_retry()
+        return _update_result()
+    if resp.status_code in (403, 429) or resp.status_code >= 500:
+        _schedule_update_retry(resp.headers)
+        return _update_result()
+    with _update_lock:
         if resp.status_code == 200:
-            data = resp.json()
-            tag = data.get('tag_name', '').lstrip('vV')
             try:
-                remote_ver = int(tag)
+                # Only tag_name is needed — scan the raw body rather than building the whole release/assets tree
+                m = RELEASE_TAG_RE.search(resp.content)
+                raw_tag = m.group(1).decode() if m else resp.json().get('tag_name', '')
+                tag = raw_tag.lstrip('vV')
+                try:
+                    remote_ver = int(tag)
+                except ValueError:
+                    remote_ver = 0
+                # Same as the release's html_url
+                _latest_version_cache['release'] = (remote_ver, f'https://github.com/{GITHUB_REPO}/releases/tag/{quote(raw_tag)}' if raw_tag
+                                                    else f'https://github.com/{GITHUB_REPO}/releases/latest')
+                _latest_version_cache['etag'] = resp.headers.get('ETag')
+                _latest_version_cache['last_modified'] = resp.headers.get('Last-Modified')
+                if remote_ver > APP_VERSION:
+                    logger.info(f"Update available: v{remote_ver} (current: v{APP_VERSION})")
             except ValueError:
-                remote_ver = 0
-            url = data.get('html_url', f'https://github.com/{GITHUB_REPO}/releases/latest')
-            _latest_version_cache['version'] = remote_ver
-            _latest_version_cache['url'] = url
-            _latest_version_cache['checked'] = datetime.now()
-            if remote_ver > APP_VERSION:
-                logger.info(f"Update available: v{remote_ver} (current: v{APP_VERSION})")
-                return remote_ver, url
-    except Exception:
-        pass  # Silently fail — update checks are optional
-    _latest_version_cache['checked'] = datetime.now()
-    return None, None
+                pass  # Malformed body — keep the previous answer until tomorrow
+        _latest_version_cache['failures'] = 0
+        _latest_version_cache['retry_at'] = None
+        _latest_version_cache['checked'] = time.monotonic()
+        _save_update_cache()
+    return _update_result()
+
+def cached_update_info():
+    """Return the last known update (instantly) and refresh it on the executor when stale — never blocks a page."""
+    global _update_future
+    if GITHUB_REPO and not shutdown_requested.is_set() and _update_check_stale() and (_update_future is None or _update_future.done()):
+        with _update_lock:
+            # Re-check under the lock so concurrent page loads queue a single GitHub request
+            if _update_check_stale() and (_update_future is None or _update_future.done()):
+                try:
+                    _update_future = executor.submit(check_for_updates)
+                except RuntimeError:
+                    pass  # Executor already shut down (quitting) — keep serving the cached answer
+    return _update_result()
+
+MIGRATIONS = ('v25_fix_expiration',)  # Data migrations tracked in _migrations; part of the schema fingerprint
 
 def migrate_database():
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
+    cursor.execute("PRAGMA synchronous=NORMAL")  # WAL is already on for the file (engine connect hook)
     
     settings_columns = [
         ('email_address', 'TEXT', '""'),
@@ -321,25 +535,44 @@ def migrate_database():
         ('last_recall_check', 'DATETIME', 'NULL'),
     ]
     
-    def add_missing_columns(table_name, columns):
-        cursor.execute(f"PRAGMA table_info({table_name})")
-        existing = {row[1] for row in cursor.fetchall()}
-        for col_name, col_type, default in columns:
-            if col_name not in existing:
-                try:
-                    cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {col_name} {col_type} DEFAULT {default}")
-                    logger.info(f"Migration: Added {table_name}.{col_name}")
-                except: pass
+    # user_version holds a fingerprint of the column manifests + data migrations; equal means nothing to do
+    schema_version = zlib.crc32(repr((settings_columns, products_columns, MIGRATIONS)).encode()) & 0x7fffffff
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] == schema_version:
+        conn.close()
+        return
     
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='settings'")
-    if cursor.fetchone(): add_missing_columns('settings', settings_columns)
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='products'")
-    if cursor.fetchone(): add_missing_columns('products', products_columns)
+    # One schema snapshot for every table we touch: table-valued pragma_table_info joined over sqlite_master
+    cursor.execute("""SELECT m.name, c.name FROM sqlite_master m JOIN pragma_table_info(m.name) c
+                      WHERE m.type='table' AND m.name IN ('settings', 'products', '_migrations')""")
+    existing = {}
+    for table_name, col_name in cursor.fetchall():
+        existing.setdefault(table_name, set()).add(col_name)
+    
+    def missing_columns(table_name, columns):
+        if table_name not in existing: return []
+        return [(table_name, col_name, col_type, default) for col_name, col_type, default in columns if col_name not in existing[table_name]]
+    
+    complete = True  # Only stamp user_version when every step succeeded, so failures retry next start
+    to_add = missing_columns('settings', settings_columns) + missing_columns('products', products_columns)
+    
+    # sqlite3 runs DDL in autocommit mode, so without an explicit transaction every ALTER is its own commit
+    # The diff above already excludes existing columns, so any ALTER failure is real: roll the batch back
+    if to_add:
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for table_name, col_name, col_type, default in to_add:
+                cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {col_name} {col_type} DEFAULT {default}")
+            conn.commit()
+            logger.info(f"Migration: Added {', '.join(f'{t}.{c}' for t, c, _, _ in to_add)}")
+        except Exception as e:
+            conn.rollback()
+            logger.warning(f"Migration: adding columns failed, will retry next start: {e}")
+            complete = False
     
     # V25 migration: Fix expiration dates for email imports (runs once)
     try:
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='_migrations'")
-        if not cursor.fetchone():
+        if '_migrations' not in existing:
             cursor.execute("CREATE TABLE _migrations (name TEXT PRIMARY KEY, applied_at TEXT)")
         cursor.execute("SELECT 1 FROM _migrations WHERE name='v25_fix_expiration'")
         if not cursor.fetchone():
@@ -349,16 +582,18 @@ def migrate_database():
             if exp_days and exp_days > 0:
                 cursor.execute("""
                     UPDATE products 
-                    SET expires_at = datetime(order_date, '+' || ? || ' days')
+                    SET expires_at = datetime(order_date, ?)
                     WHERE source = 'email' AND order_date IS NOT NULL AND is_archived = 0
-                """, (exp_days,))
+                """, (f'+{int(exp_days)} days',))
                 if cursor.rowcount > 0:
                     logger.info(f"Migration V25: Recalculated expiration for {cursor.rowcount} email-imported products (order_date + {exp_days}d)")
-            cursor.execute("INSERT INTO _migrations VALUES ('v25_fix_expiration', ?)", (datetime.now().isoformat(),))
+            cursor.execute("INSERT INTO _migrations VALUES ('v25_fix_expiration', strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))")
     except Exception as e:
         logger.warning(f"Migration note: {e}")
+        complete = False
     
     conn.commit()
+    if complete: cursor.execute(f"PRAGMA user_version = {schema_version}")
     conn.close()
 
 LAYOUT_TPL = """
@@ -484,6 +719,13 @@ LAYOUT_TPL = """
         .recall-banner .recall-btn{padding:5px 12px;border-radius:6px;font-size:0.8em;cursor:pointer;border:1px solid var(--border);font-weight:600;transition:all 0.15s;font-family:inherit}
         .recall-btn-dismiss{background:transparent;color:var(--muted)}.recall-btn-dismiss:hover{border-color:var(--muted);background:var(--surface)}
         .recall-btn-link{background:rgba(9,105,218,0.1);color:var(--info);border-color:rgba(9,105,218,0.25)}.recall-btn-link:hover{background:rgba(9,105,218,0.18)}
+        /* ─── Settings forms ─── */
+        .f-title{margin:0 0 4px;font-size:1em;font-weight:700;display:flex;align-items:center;gap:8px}
+        .f-desc{font-size:0.82em;color:var(--muted);margin:0 0 16px}
+        .f-label{font-size:0.78em;color:var(--muted);font-weight:600;text-transform:uppercase;letter-spacing:0.04em;display:block;margin-bottom:6px}
+        .f-hint{font-size:0.78em;color:var(--muted);margin:10px 0 0}
+        .f-grid2{display:grid;grid-template-columns:1fr 1fr;gap:12px}.f-grid2.f-end{align-items:end}
+        .f-inline{display:flex;gap:12px;align-items:center}.f-inline label{margin:0;font-size:0.85em;font-weight:600;white-space:nowrap}
         /* ─── Responsive ─── */
         @media(max-width:768px){.stats-grid{grid-template-columns:repeat(2,1fr)}.grid{grid-template-columns:1fr}.threshold-grid{grid-template-columns:1fr}.nav{flex-wrap:wrap;gap:10px}.nav-links{gap:2px}.app-container{padding:0 16px 32px}.nav{padding:12px 16px;margin:0 -16px 20px}}
     </style>
@@ -555,7 +797,12 @@ LAYOUT_TPL = """
             try{
                 const r=await fetch('/api/check/'+id,{method:'POST'});
                 const d=await r.json();
-                if(d.success){if(status){status.className='check-status show success';status.innerHTML='✅ '+d.message;}setTimeout(()=>location.reload(),1500);}
+                if(d.success){
+                    if(status){status.className='check-status show success';status.innerHTML='✅ '+d.message;}
+                    const card=document.getElementById('card-'+id);
+                    if(d.html&&card){setTimeout(()=>{document.getElementById('modal-'+id)?.remove();card.outerHTML=d.html;},1500);}
+                    else setTimeout(()=>location.reload(),1500);
+                }
                 else{if(status){status.className='check-status show error';status.innerHTML='❌ '+(d.error||'Failed');}btn.disabled=false;btn.innerHTML=orig;}
             }catch(e){if(status){status.className='check-status show error';status.innerHTML='❌ '+e.message;}btn.disabled=false;btn.innerHTML=orig;}
         }
@@ -575,7 +822,11 @@ LAYOUT_TPL = """
             }catch(e){alert('❌ '+e.message);}
             btn.disabled=false;btn.innerHTML=orig;
         }
+        // Only the latest save per form matters: abort the previous request instead of queueing behind it
+        const saveCtrls=new Map();
+        function latestSignal(key){saveCtrls.get(key)?.abort();const c=new AbortController();saveCtrls.set(key,c);return c.signal;}
         async function autoSaveEmail(){
+            emailTimeout=null;
             const email=document.getElementById('email-input').value;
             const password=document.getElementById('password-input').value;
             const indicator=document.getElementById('auto-save-indicator');
@@ -583,18 +834,20 @@ LAYOUT_TPL = """
             const scanBtn=document.getElementById('scan-orders-btn');
             if(email && password){
                 try{
-                    const r=await fetch('/api/save-email',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({email,password})});
+                    const r=await fetch('/api/save-email',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({email,password}),signal:latestSignal('email')});
                     const d=await r.json();
                     if(d.success){indicator.textContent='✓ Saved';indicator.classList.add('show');setTimeout(()=>indicator.classList.remove('show'),2000);testBtn.disabled=false;if(scanBtn)scanBtn.disabled=false;}
                 }catch(e){}
             }
         }
+        const SETTINGS_FIELDS=['alert_new_pct','alert_new_dollars','alert_used_pct','alert_used_dollars','target_price','purchase_price'];
         async function saveProductSettings(id){
-            const form=document.getElementById('settings-form-'+id);
-            const data=new FormData(form);
+            const form=document.getElementById('settings-form-'+id),data={};
+            // Same fields FormData would send (disabled ones skipped); empty ones are left out, the server clears what's missing
+            for(const n of SETTINGS_FIELDS){const el=form.elements[n];if(el&&!el.disabled&&el.value)data[n]=el.value;}
             const indicator=document.getElementById('save-indicator-'+id);
             try{
-                const r=await fetch('/api/product/'+id+'/settings',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(Object.fromEntries(data))});
+                const r=await fetch('/api/product/'+id+'/settings',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(data),signal:latestSignal(id)});
                 const d=await r.json();
                 if(d.success){indicator.textContent='✓ Saved';indicator.classList.add('show');setTimeout(()=>indicator.classList.remove('show'),2000);}
             }catch(e){}
@@ -604,6 +857,12 @@ LAYOUT_TPL = """
         function closeModal(id){document.getElementById('modal-'+id).classList.remove('show');document.body.style.overflow='auto';}
         let emailTimeout;
         function debounceEmailSave(){clearTimeout(emailTimeout);emailTimeout=setTimeout(autoSaveEmail,1000);}
+        // Leaving inside the debounce window: keepalive JSON POST (no text/plain beacon) so the save isn't lost
+        window.addEventListener('pagehide',()=>{
+            if(!emailTimeout)return;clearTimeout(emailTimeout);emailTimeout=null;
+            const email=document.getElementById('email-input').value,password=document.getElementById('password-input').value;
+            if(email && password)fetch('/api/save-email',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({email,password}),keepalive:true});
+        });
         async function scanRecalls(btn){
             const orig=btn.innerHTML;btn.disabled=true;btn.innerHTML='<div class="loader"></div> Scanning CPSC...';
             try{const r=await fetch('/api/scan-recalls',{method:'POST'});const d=await r.json();alert(d.success?'✅ '+d.message:'❌ '+(d.error||'Failed'));if(d.success)location.reload();}
@@ -620,60 +879,48 @@ LAYOUT_TPL = """
 </html>
 """
 
-INDEX_TPL = """
-{% extends "layout" %}
-{% block content %}
-{% if update_available %}
-<div style="background:linear-gradient(135deg,rgba(9,105,218,0.12),rgba(9,105,218,0.06));border:1px solid rgba(9,105,218,0.25);color:var(--text);padding:12px 18px;border-radius:8px;margin-bottom:14px;display:flex;justify-content:space-between;align-items:center;font-size:0.88em;">
-    <span>🆕 <strong>Update available:</strong> v{{ update_version }} (you have v{{ current_version }})</span>
-    <a href="{{ update_url }}" target="_blank" style="background:rgba(9,105,218,0.15);color:var(--info);padding:6px 14px;border-radius:6px;text-decoration:none;font-weight:600;font-size:0.9em;border:1px solid rgba(9,105,218,0.3);">Download Update</a>
-</div>
-{% endif %}
-<div class="stats-grid">
-    <div class="stat-card"><div class="stat-value">{{ stats.active }}</div><div class="stat-label">Active</div></div>
-    <div class="stat-card"><div class="stat-value">{{ stats.alerts_today }}</div><div class="stat-label">Alerts Today</div></div>
-    <div class="stat-card"><div class="stat-value">{{ stats.at_target }}</div><div class="stat-label">At Target</div></div>
-    <div class="stat-card"><div class="stat-value">{{ stats.from_orders }}</div><div class="stat-label">From Orders</div></div>
-    <div class="stat-card"><div class="stat-value" style="color:{{ 'var(--danger)' if stats.recalls > 0 else 'var(--success)' }}">{{ stats.recalls }}</div><div class="stat-label">⚠️ Recalls</div></div>
-</div>
-<div class="card" style="display:flex;justify-content:space-between;align-items:center;flex-wrap:wrap;gap:10px;padding:14px 22px;">
-    <div style="font-size:0.88em;color:var(--muted);display:flex;align-items:center;gap:8px;">
-        <span style="width:8px;height:8px;border-radius:50%;background:var(--success);display:inline-block;"></span>
-        <span>Last: <strong style="color:var(--text);">{{ last_run_time }}</strong></span>
-        {% if next_run_time %}<span style="opacity:0.5;">·</span><span>Next: ~{{ next_run_time }}</span>{% endif %}
-    </div>
-    <div style="display:flex;gap:8px;">
-        <button class="btn btn-info btn-sm" onclick="scanOrders(this)" {% if not email_configured %}disabled title="Configure email in Settings first"{% endif %}>📧 Import</button>
-        <button class="btn btn-danger btn-sm" onclick="scanRecalls(this)">🛡️ Recalls</button>
-        <form action="/check-all" method="POST" style="margin:0;"><button class="btn btn-primary btn-sm" onclick="if(!confirm('Check all products? This scrapes each one (30-60s each) and may take a while.'))return false;this.innerHTML='<div class=\\'loader\\'></div> Running...'">⚡ Check All</button></form>
-    </div>
-</div>
-<div class="card">
-    <div class="section-header"><h2 style="font-size:1em;">➕ Add Items</h2></div>
-    <form action="/add" method="POST">
-        <textarea name="urls" placeholder="Paste Amazon product URLs or ASINs — one per line. Examples:&#10;https://www.amazon.com/dp/B08N5WRWNW&#10;B08N5WRWNW" rows="3" style="font-size:0.9em;resize:vertical;"></textarea>
-        <div style="margin-top:12px;display:flex;gap:10px;flex-wrap:wrap;align-items:center;">
-            <input type="number" name="price" placeholder="Target $" step="0.01" min="0" style="width:120px;font-size:0.88em;">
-            <select name="expiration" style="width:170px;font-size:0.88em;"><option value="">Default ({{ settings.default_expiration_days }}d)</option><option value="7">7 days</option><option value="14">14 days</option><option value="30">30 days</option><option value="60">60 days</option><option value="0">Never expire</option></select>
-            <div style="flex:1;"></div><button class="btn btn-primary">Track</button>
-        </div>
-    </form>
-</div>
-{% if products %}
-<div class="section-header"><h2 style="font-size:1em;">📋 Tracked ({{ products|length }})</h2><div style="display:flex;gap:8px;align-items:center;"><select onchange="window.location='/?sort='+this.value" style="padding:7px 12px;border-radius:var(--radius-sm);background:var(--surface);color:var(--text);border:1px solid var(--border);font-size:0.82em;font-family:inherit;"><option value="newest" {{'selected' if current_sort=='newest' else ''}}>Newest Added</option><option value="oldest" {{'selected' if current_sort=='oldest' else ''}}>Oldest Added</option><option value="order_date" {{'selected' if current_sort=='order_date' else ''}}>Order Date</option><option value="last_checked" {{'selected' if current_sort=='last_checked' else ''}}>Last Checked</option><option value="price_low" {{'selected' if current_sort=='price_low' else ''}}>Price: Low→High</option><option value="price_high" {{'selected' if current_sort=='price_high' else ''}}>Price: High→Low</option><option value="biggest_drop" {{'selected' if current_sort=='biggest_drop' else ''}}>Biggest $ Drop</option><option value="pct_drop" {{'selected' if current_sort=='pct_drop' else ''}}>Biggest % Drop</option><option value="name" {{'selected' if current_sort=='name' else ''}}>Name A-Z</option></select><form action="/archive-expired" method="POST" style="margin:0;"><button class="btn btn-sm" style="background:var(--surface);color:var(--muted);border:1px solid var(--border);">📁 Archive Expired</button></form><form action="/clear-all" method="POST" style="margin:0;"><button class="btn btn-sm" style="background:transparent;color:var(--danger);border:1px solid var(--danger);padding:6px 10px;" onclick="return confirm('Delete ALL tracked products?')">🗑️</button></form></div></div>
-<div class="grid">
-{% for p in products %}
-<div class="card product-card">
+def _minify_css(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};,>])\s*', r'\1', css).strip()
+
+# Whitespace that is content: <textarea>/<pre> bodies and quoted attribute values
+_MINIFY_KEEP_RE = re.compile(r'<(textarea|pre)\b.*?</\1\s*>|=\s*"[^"]*"|=\s*\'[^\']*\'', re.S | re.I)
+
+def _minify_html(tpl):
+    # Collapse source indentation outside _MINIFY_KEEP_RE spans (templates only, at load)
+    out, pos = [], 0
+    for m in _MINIFY_KEEP_RE.finditer(tpl):
+        out.append(re.sub(r'\n\s+', '\n', tpl[pos:m.start()]))
+        out.append(m.group())
+        pos = m.end()
+    out.append(re.sub(r'\n\s+', '\n', tpl[pos:]))
+    return ''.join(out).strip()
+
+# Static stylesheet, served once as /app.css (?v= content hash)
+_layout_style = re.search(r'<style>(.*?)</style>', LAYOUT_TPL, re.S)
+LAYOUT_CSS = _minify_css(_layout_style.group(1))
+LAYOUT_CSS_VERSION = hashlib.sha1(LAYOUT_CSS.encode()).hexdigest()[:10]
+LAYOUT_CSS_GZ = gzip.compress(LAYOUT_CSS.encode(), 9)  # Compressed once, not per response
+LAYOUT_TPL = (LAYOUT_TPL[:_layout_style.start()] + f'<link rel="stylesheet" href="/app.css?v={LAYOUT_CSS_VERSION}">'
+              + LAYOUT_TPL[_layout_style.end():])
+
+# Same for the page script (no Jinja inside), served as /app.js
+_layout_script = re.search(r'<script>(.*?)</script>', LAYOUT_TPL, re.S)
+LAYOUT_JS = _layout_script.group(1).strip()
+LAYOUT_JS_VERSION = hashlib.sha1(LAYOUT_JS.encode()).hexdigest()[:10]
+LAYOUT_JS_GZ = gzip.compress(LAYOUT_JS.encode(), 9)
+LAYOUT_TPL = (LAYOUT_TPL[:_layout_script.start()] + f'<script src="/app.js?v={LAYOUT_JS_VERSION}"></script>'
+              + LAYOUT_TPL[_layout_script.end():])
+
+# One product card; included by the index loop and rendered alone by /api/check to refresh just that card
+PRODUCT_CARD_TPL = """
+{% set fmt = labels[p.id] %}
+<div class="card product-card" id="card-{{p.id}}">
     <div class="product-topbar">
         <div style="display:flex;align-items:center;gap:8px;">
-            {% if p.expires_at %}
-                {% set days_left = ((p.expires_at - now).days) %}
-                {% if days_left <= 0 %}<span class="badge badge-danger">Expired</span>
-                {% elif days_left <= 3 %}<span class="badge badge-warning">{{ days_left }}d left</span>
-                {% elif days_left <= 7 %}<span class="badge badge-info">{{ days_left }}d left</span>
-                {% else %}<span class="badge badge-muted">{{ days_left }}d left</span>{% endif %}
-            {% else %}<span class="badge badge-muted">No expiry</span>{% endif %}
-            {% if p.source == 'email' %}<span class="source-badge email">📧 Order{% if p.purchase_price %} ${{ "%.2f"|format(p.purchase_price) }}{% endif %}</span>{% endif %}
+            <span class="badge badge-{{ fmt.expiry[0] }}">{{ fmt.expiry[1] }}</span>
+            {% if p.source == 'email' %}<span class="source-badge email">📧 Order{% if fmt.purchase %} ${{ fmt.purchase }}{% endif %}</span>{% endif %}
             <button class="settings-toggle" onclick="toggleSettings({{p.id}})" title="Alert Settings">⚙️</button>
         </div>
         <form action="/delete/{{p.id}}" method="POST" style="margin:0;">
@@ -681,52 +928,42 @@ INDEX_TPL = """
         </form>
     </div>
     <div class="product-title"><a href="{{p.url}}" target="_blank">{{ p.title }}</a></div>
-    {% if p.recall_status == 'matched' %}
+    {% set recall = fmt.recall %}
+    {% if recall.mode == 'matched' %}
     <div class="recall-banner">
-        <strong>⚠️ RECALL ALERT</strong>{% if p.recall_date %} <span style="opacity:0.7;font-size:0.85em;">· Recalled {{ p.recall_date[:10] }}</span>{% endif %}
+        <strong>⚠️ RECALL ALERT</strong>{% if recall.date %} <span style="opacity:0.7;font-size:0.85em;">· Recalled {{ recall.date }}</span>{% endif %}
         <div class="recall-details">
-            {{ p.recall_title or 'Product recall detected' }}
-            {% if p.recall_hazard %}<br>🔴 <strong>Hazard:</strong> {{ p.recall_hazard[:200] }}{% endif %}
-            {% if p.recall_remedy %}<br>✅ <strong>Remedy:</strong> {{ p.recall_remedy[:200] }}{% endif %}
+            {{ recall.title }}
+            {% if recall.hazard %}<br>🔴 <strong>Hazard:</strong> {{ recall.hazard }}{% endif %}
+            {% if recall.remedy %}<br>✅ <strong>Remedy:</strong> {{ recall.remedy }}{% endif %}
         </div>
         <div class="recall-actions">
-            {% if p.recall_url %}<a href="{{ p.recall_url }}" target="_blank" class="recall-btn recall-btn-link">📋 Full Details</a>{% endif %}
+            {% if recall.url %}<a href="{{ recall.url }}" target="_blank" class="recall-btn recall-btn-link">📋 Full Details</a>{% endif %}
             <button class="recall-btn recall-btn-dismiss" onclick="dismissRecall({{p.id}})">✕ Dismiss</button>
         </div>
     </div>
-    {% elif p.recall_status == 'dismissed' %}
+    {% elif recall.mode == 'dismissed' %}
     <div style="font-size:0.75em;color:var(--muted);margin:4px 0;">ℹ️ Recall dismissed <button class="recall-btn recall-btn-dismiss" style="font-size:0.9em;padding:2px 6px;border:1px solid var(--border);border-radius:3px;cursor:pointer;color:var(--muted);background:transparent" onclick="dismissRecall({{p.id}})">Re-check</button></div>
-    {% elif p.last_recall_check %}
-    <div style="font-size:0.7em;color:var(--success);margin:2px 0;">✅ No recalls found ({{ p.last_recall_check.strftime('%m/%d') }})</div>
+    {% elif recall.mode == 'clean' %}
+    <div style="font-size:0.7em;color:var(--success);margin:2px 0;">✅ No recalls found ({{ recall.checked }})</div>
     {% endif %}
     <div class="prices-row">
         <div class="price-col">
             <label>New</label>
             <div class="price-display price-new {{ 'price-hit' if p.current_new_price and p.target_price and p.current_new_price <= p.target_price }}">
-                {% if p.current_new_price %}${{ "%.2f"|format(p.current_new_price) }}{% else %}<span class="price-na">--</span>{% endif %}
+                {% if fmt.new %}${{ fmt.new }}{% else %}<span class="price-na">--</span>{% endif %}
             </div>
-            {% if p.current_new_price and p.purchase_price and p.current_new_price < p.purchase_price %}
-            {% set new_drop_pct = ((p.purchase_price - p.current_new_price) / p.purchase_price * 100) %}
-            {% set new_drop_amt = p.purchase_price - p.current_new_price %}
-            <div class="drop-indicator">⬇️ {{ "%.1f"|format(new_drop_pct) }}% (${{ "%.2f"|format(new_drop_amt) }})</div>
-            {% elif p.current_new_price and p.purchase_price and p.current_new_price > p.purchase_price %}
-            {% set new_up_pct = ((p.current_new_price - p.purchase_price) / p.purchase_price * 100) %}
-            <div class="up-indicator">⬆️ {{ "%.1f"|format(new_up_pct) }}%</div>
-            {% endif %}
-            {% if p.lowest_new_price %}<div class="history-row"><span class="low">Low: ${{ "%.2f"|format(p.lowest_new_price) }}</span>{% if p.highest_new_price %}<span class="high">High: ${{ "%.2f"|format(p.highest_new_price) }}</span>{% endif %}</div>{% endif %}
+            {% if fmt.new_drop %}<div class="drop-indicator">⬇️ {{ fmt.new_drop[0] }}% (${{ fmt.new_drop[1] }})</div>
+            {% elif fmt.new_up %}<div class="up-indicator">⬆️ {{ fmt.new_up }}%</div>{% endif %}
+            {% if fmt.low_new %}<div class="history-row"><span class="low">Low: ${{ fmt.low_new }}</span>{% if fmt.high_new %}<span class="high">High: ${{ fmt.high_new }}</span>{% endif %}</div>{% endif %}
         </div>
         <div class="price-col" style="text-align:right;">
             <label>Used</label>
             <div class="price-display price-used {{ 'price-hit' if p.current_used_price and p.target_price and p.current_used_price <= p.target_price }}">
-                {% if p.current_used_price %}${{ "%.2f"|format(p.current_used_price) }}{% else %}<span class="price-na">--</span>{% endif %}
+                {% if fmt.used %}${{ fmt.used }}{% else %}<span class="price-na">--</span>{% endif %}
             </div>
-            {% if p.current_used_price and (p.highest_used_price or p.purchase_price) and p.current_used_price < (p.highest_used_price or p.purchase_price) %}
-            {% set used_ref = p.highest_used_price or p.purchase_price %}
-            {% set used_drop_pct = ((used_ref - p.current_used_price) / used_ref * 100) %}
-            {% set used_drop_amt = used_ref - p.current_used_price %}
-            <div class="drop-indicator">⬇️ {{ "%.1f"|format(used_drop_pct) }}% (${{ "%.2f"|format(used_drop_amt) }})</div>
-            {% endif %}
-            {% if p.lowest_used_price %}<div class="history-row"><span class="low">Low: ${{ "%.2f"|format(p.lowest_used_price) }}</span>{% if p.highest_used_price %}<span class="high">High: ${{ "%.2f"|format(p.highest_used_price) }}</span>{% endif %}</div>{% endif %}
+            {% if fmt.used_drop %}<div class="drop-indicator">⬇️ {{ fmt.used_drop[0] }}% (${{ fmt.used_drop[1] }})</div>{% endif %}
+            {% if fmt.low_used %}<div class="history-row"><span class="low">Low: ${{ fmt.low_used }}</span>{% if fmt.high_used %}<span class="high">High: ${{ fmt.high_used }}</span>{% endif %}</div>{% endif %}
         </div>
     </div>
     <div id="settings-{{p.id}}" class="product-settings">
@@ -773,34 +1010,29 @@ INDEX_TPL = """
         </form>
     </div>
     <div class="price-chart">
+        {% set chart = charts[p.id] %}
         <div class="chart-header">
-            <span class="chart-title">📈 History ({{ p.get_price_history()|length }} checks)</span>
+            <span class="chart-title">📈 History ({{ chart.count }} checks)</span>
             {% if p.screenshot_main or p.screenshot_offers %}
                 <button class="screenshot-btn" onclick="openModal({{p.id}})">📷 View Screenshots</button>
             {% else %}
                 <span style="font-size:0.7em;color:var(--muted);">No screenshots yet</span>
             {% endif %}
         </div>
-        {% set history = p.get_price_history() %}
-        {% if history|length > 1 %}
-            {% set prices = [] %}{% for h in history %}{% if h.new %}{% set _ = prices.append(h.new) %}{% endif %}{% if h.used %}{% set _ = prices.append(h.used) %}{% endif %}{% endfor %}
-            {% if prices %}
-                {% set minp = prices|min %}{% set maxp = prices|max %}{% set rng = maxp - minp if maxp != minp else 1 %}
+        {% if chart.count > 1 %}
+            {% if chart.bars %}
                 <div class="chart-wrapper">
-                    <div class="chart-y-axis"><span>${{ "%.0f"|format(maxp) }}</span><span>${{ "%.0f"|format(minp) }}</span></div>
+                    <div class="chart-y-axis"><span>${{ chart.max_label }}</span><span>${{ chart.min_label }}</span></div>
                     <div class="chart-baseline"></div>
-                    {% for h in history %}
-                        {% if h.new %}{% set ht = ((h.new - minp) / rng * 100) %}<div class="chart-bar new" style="height:{{ [ht,8]|max }}%;" title="{{ h.date }}: New ${{ '%.2f'|format(h.new) }}"></div>{% endif %}
-                        {% if h.used %}{% set ht = ((h.used - minp) / rng * 100) %}<div class="chart-bar used" style="height:{{ [ht,8]|max }}%;" title="{{ h.date }}: Used ${{ '%.2f'|format(h.used) }}"></div>{% endif %}
-                    {% endfor %}
+                    {% for bar in chart.bars %}<div class="chart-bar {{ bar.kind }}" style="height:{{ bar.height }}%;" title="{{ bar.title }}"></div>{% endfor %}
                 </div>
-                <div class="chart-legend"><span><div class="dot new"></div>New</span>{% if history|selectattr('used')|list %}<span><div class="dot used"></div>Used</span>{% endif %}</div>
+                <div class="chart-legend"><span><div class="dot new"></div>New</span>{% if chart.has_used %}<span><div class="dot used"></div>Used</span>{% endif %}</div>
             {% else %}<div class="no-chart">Waiting for price data...</div>{% endif %}
         {% else %}<div class="no-chart">Chart appears after 2+ checks</div>{% endif %}
     </div>
     <div class="product-meta">
-        <span>🎯 Target: {{ "$%.2f"|format(p.target_price) if p.target_price else 'Not set' }}</span>
-        <span>🕐 {{ p.last_checked.strftime('%m/%d %I:%M%p').lower() if p.last_checked else 'Never checked' }}</span>
+        <span>🎯 Target: {{ fmt.target }}</span>
+        <span>🕐 {{ fmt.last_checked }}</span>
     </div>
     <div id="status-{{p.id}}" class="check-status"></div>
     <div class="actions-row">
@@ -818,6 +1050,52 @@ INDEX_TPL = """
     </div>
 </div>
 {% endif %}
+"""
+
+INDEX_TPL = """
+{% extends "layout.html" %}
+{% block content %}
+{% if update_available %}
+<div style="background:linear-gradient(135deg,rgba(9,105,218,0.12),rgba(9,105,218,0.06));border:1px solid rgba(9,105,218,0.25);color:var(--text);padding:12px 18px;border-radius:8px;margin-bottom:14px;display:flex;justify-content:space-between;align-items:center;font-size:0.88em;">
+    <span>🆕 <strong>Update available:</strong> v{{ update_version }} (you have v{{ current_version }})</span>
+    <a href="{{ update_url }}" target="_blank" style="background:rgba(9,105,218,0.15);color:var(--info);padding:6px 14px;border-radius:6px;text-decoration:none;font-weight:600;font-size:0.9em;border:1px solid rgba(9,105,218,0.3);">Download Update</a>
+</div>
+{% endif %}
+<div class="stats-grid">
+    <div class="stat-card"><div class="stat-value">{{ stats.active }}</div><div class="stat-label">Active</div></div>
+    <div class="stat-card"><div class="stat-value">{{ stats.alerts_today }}</div><div class="stat-label">Alerts Today</div></div>
+    <div class="stat-card"><div class="stat-value">{{ stats.at_target }}</div><div class="stat-label">At Target</div></div>
+    <div class="stat-card"><div class="stat-value">{{ stats.from_orders }}</div><div class="stat-label">From Orders</div></div>
+    <div class="stat-card"><div class="stat-value" style="color:{{ 'var(--danger)' if stats.recalls > 0 else 'var(--success)' }}">{{ stats.recalls }}</div><div class="stat-label">⚠️ Recalls</div></div>
+</div>
+<div class="card" style="display:flex;justify-content:space-between;align-items:center;flex-wrap:wrap;gap:10px;padding:14px 22px;">
+    <div style="font-size:0.88em;color:var(--muted);display:flex;align-items:center;gap:8px;">
+        <span style="width:8px;height:8px;border-radius:50%;background:var(--success);display:inline-block;"></span>
+        <span>Last: <strong style="color:var(--text);">{{ last_run_time }}</strong></span>
+        {% if next_run_time %}<span style="opacity:0.5;">·</span><span>Next: ~{{ next_run_time }}</span>{% endif %}
+    </div>
+    <div style="display:flex;gap:8px;">
+        <button class="btn btn-info btn-sm" onclick="scanOrders(this)" {% if not email_configured %}disabled title="Configure email in Settings first"{% endif %}>📧 Import</button>
+        <button class="btn btn-danger btn-sm" onclick="scanRecalls(this)">🛡️ Recalls</button>
+        <form action="/check-all" method="POST" style="margin:0;"><button class="btn btn-primary btn-sm" onclick="if(!confirm('Check all products? This scrapes each one (30-60s each) and may take a while.'))return false;this.innerHTML='<div class=\\'loader\\'></div> Running...'">⚡ Check All</button></form>
+    </div>
+</div>
+<div class="card">
+    <div class="section-header"><h2 style="font-size:1em;">➕ Add Items</h2></div>
+    <form action="/add" method="POST">
+        <textarea name="urls" placeholder="Paste Amazon product URLs or ASINs — one per line. Examples:&#10;https://www.amazon.com/dp/B08N5WRWNW&#10;B08N5WRWNW" rows="3" style="font-size:0.9em;resize:vertical;"></textarea>
+        <div style="margin-top:12px;display:flex;gap:10px;flex-wrap:wrap;align-items:center;">
+            <input type="number" name="price" placeholder="Target $" step="0.01" min="0" style="width:120px;font-size:0.88em;">
+            <select name="expiration" style="width:170px;font-size:0.88em;"><option value="">Default ({{ settings.default_expiration_days }}d)</option><option value="7">7 days</option><option value="14">14 days</option><option value="30">30 days</option><option value="60">60 days</option><option value="0">Never expire</option></select>
+            <div style="flex:1;"></div><button class="btn btn-primary">Track</button>
+        </div>
+    </form>
+</div>
+{% if products %}
+<div class="section-header"><h2 style="font-size:1em;">📋 Tracked ({{ products|length }})</h2><div style="display:flex;gap:8px;align-items:center;"><select onchange="window.location='/?sort='+this.value" style="padding:7px 12px;border-radius:var(--radius-sm);background:var(--surface);color:var(--text);border:1px solid var(--border);font-size:0.82em;font-family:inherit;"><option value="newest" {{'selected' if current_sort=='newest' else ''}}>Newest Added</option><option value="oldest" {{'selected' if current_sort=='oldest' else ''}}>Oldest Added</option><option value="order_date" {{'selected' if current_sort=='order_date' else ''}}>Order Date</option><option value="last_checked" {{'selected' if current_sort=='last_checked' else ''}}>Last Checked</option><option value="price_low" {{'selected' if current_sort=='price_low' else ''}}>Price: Low→High</option><option value="price_high" {{'selected' if current_sort=='price_high' else ''}}>Price: High→Low</option><option value="biggest_drop" {{'selected' if current_sort=='biggest_drop' else ''}}>Biggest $ Drop</option><option value="pct_drop" {{'selected' if current_sort=='pct_drop' else ''}}>Biggest % Drop</option><option value="name" {{'selected' if current_sort=='name' else ''}}>Name A-Z</option></select><form action="/archive-expired" method="POST" style="margin:0;"><button class="btn btn-sm" style="background:var(--surface);color:var(--muted);border:1px solid var(--border);">📁 Archive Expired</button></form><form action="/clear-all" method="POST" style="margin:0;"><button class="btn btn-sm" style="background:transparent;color:var(--danger);border:1px solid var(--danger);padding:6px 10px;" onclick="return confirm('Delete ALL tracked products?')">🗑️</button></form></div></div>
+<div class="grid">
+{% for p in products %}
+{% include "product_card.html" %}
 {% endfor %}
 </div>
 {% else %}
@@ -827,21 +1105,22 @@ INDEX_TPL = """
 """
 
 ARCHIVE_TPL = """
-{% extends "layout" %}
+{% extends "layout.html" %}
 {% block content %}
 <div class="section-header"><h2>📁 Archived ({{ products|length }})</h2>{% if products %}<form action="/delete-all-archived" method="POST" style="margin:0;"><button class="btn btn-danger btn-sm" onclick="return confirm('Delete all?')">🗑️ Delete All</button></form>{% endif %}</div>
 {% if products %}
 <div class="grid">
 {% for p in products %}
+{% set fmt = labels[p.id] %}
 <div class="card product-card">
     <div class="product-topbar">
-        <span class="badge badge-muted">Archived {{ p.archived_at.strftime('%m/%d/%y') if p.archived_at else '' }}</span>
+        <span class="badge badge-muted">Archived {{ fmt.archived }}</span>
         <form action="/delete/{{p.id}}" method="POST" style="margin:0;"><button class="delete-btn" onclick="return confirm('Delete?')" title="Delete">✕</button></form>
     </div>
     <div class="product-title"><a href="{{p.url}}" target="_blank">{{ p.title }}</a></div>
     <div class="prices-row">
-        <div class="price-col"><label>Last New</label><div class="price-display price-new">{% if p.current_new_price %}${{ "%.2f"|format(p.current_new_price) }}{% else %}<span class="price-na">--</span>{% endif %}</div></div>
-        <div class="price-col" style="text-align:right;"><label>Last Used</label><div class="price-display price-used">{% if p.current_used_price %}${{ "%.2f"|format(p.current_used_price) }}{% else %}<span class="price-na">--</span>{% endif %}</div></div>
+        <div class="price-col"><label>Last New</label><div class="price-display price-new">{% if fmt.new %}${{ fmt.new }}{% else %}<span class="price-na">--</span>{% endif %}</div></div>
+        <div class="price-col" style="text-align:right;"><label>Last Used</label><div class="price-display price-used">{% if fmt.used %}${{ fmt.used }}{% else %}<span class="price-na">--</span>{% endif %}</div></div>
     </div>
     <div class="actions-row">
         <form action="/restore/{{p.id}}" method="POST" style="margin:0;flex:1;"><button class="btn btn-success btn-sm" style="width:100%;">↩️ Restore</button></form>
@@ -857,7 +1136,7 @@ ARCHIVE_TPL = """
 """
 
 SETTINGS_TPL = """
-{% extends "layout" %}
+{% extends "layout.html" %}
 {% block content %}
 <div style="max-width:640px;margin:0 auto;">
     <div style="margin-bottom:24px;">
@@ -867,77 +1146,70 @@ SETTINGS_TPL = """
     <form method="POST">
         <!-- Email Configuration -->
         <div class="card">
-            <h3 style="margin:0 0 4px;font-size:1em;font-weight:700;display:flex;align-items:center;gap:8px;">📧 Email <span id="auto-save-indicator" class="auto-save-indicator">✓ Saved</span></h3>
-            <p style="font-size:0.82em;color:var(--muted);margin:0 0 16px;">Used for price drop alerts and importing your Amazon orders.</p>
-            <div style="display:grid;grid-template-columns:1fr 1fr;gap:12px;">
-                <div><label style="font-size:0.78em;color:var(--muted);font-weight:600;text-transform:uppercase;letter-spacing:0.04em;display:block;margin-bottom:6px;">Gmail Address</label>
+            <h3 class="f-title">📧 Email <span id="auto-save-indicator" class="auto-save-indicator">✓ Saved</span></h3>
+            <p class="f-desc">Used for price drop alerts and importing your Amazon orders.</p>
+            <div class="f-grid2">
+                <div><label class="f-label">Gmail Address</label>
                 <input type="email" id="email-input" name="email" value="{{ settings.email_address }}" placeholder="you@gmail.com" oninput="debounceEmailSave()"></div>
-                <div><label style="font-size:0.78em;color:var(--muted);font-weight:600;text-transform:uppercase;letter-spacing:0.04em;display:block;margin-bottom:6px;">App Password <span class="tooltip"><span class="info-icon">i</span><span class="tooltip-text"><strong>Gmail App Password</strong><br><br>This is NOT your regular Gmail password. Go to Google Account → Security → 2-Step Verification → App Passwords, then generate one for "Mail". It looks like "xxxx xxxx xxxx xxxx".</span></span> <a href="https://myaccount.google.com/apppasswords" target="_blank" style="font-size:0.9em;color:var(--info);text-decoration:none;">↗ Get one</a></label>
+                <div><label class="f-label">App Password <span class="tooltip"><span class="info-icon">i</span><span class="tooltip-text"><strong>Gmail App Password</strong><br><br>This is NOT your regular Gmail password. Go to Google Account → Security → 2-Step Verification → App Passwords, then generate one for "Mail". It looks like "xxxx xxxx xxxx xxxx".</span></span> <a href="https://myaccount.google.com/apppasswords" target="_blank" style="font-size:0.9em;color:var(--info);text-decoration:none;">↗ Get one</a></label>
                 <input type="password" id="password-input" name="password" value="{{ settings.email_password }}" placeholder="xxxx xxxx xxxx xxxx" oninput="debounceEmailSave()"></div>
             </div>
             <div style="display:flex;gap:8px;margin-top:14px;">
                 <button type="button" id="test-email-btn" class="btn btn-secondary btn-sm" onclick="testEmail(this)" {% if not settings.email_address or not settings.email_password %}disabled{% endif %}>📬 Test Email</button>
                 <button type="button" id="scan-orders-btn" class="btn btn-info btn-sm" onclick="scanOrders(this)" {% if not settings.email_address or not settings.email_password %}disabled{% endif %}>📧 Import Orders Now</button>
             </div>
-            <p style="font-size:0.78em;color:var(--muted);margin:10px 0 0;">Credentials auto-save as you type.</p>
+            <p class="f-hint">Credentials auto-save as you type.</p>
         </div>
         
         <!-- Order Import -->
         <div class="card">
-            <h3 style="margin:0 0 4px;font-size:1em;font-weight:700;display:flex;align-items:center;gap:8px;">📦 Order Auto-Import
+            <h3 class="f-title">📦 Order Auto-Import
                 <span class="tooltip"><span class="info-icon">i</span>
                     <span class="tooltip-text"><strong>Amazon Order Import</strong><br><br>Scans your Gmail for Amazon order confirmation emails and auto-tracks those products. Extracts ASINs directly from email links for 100% accuracy. Runs automatically based on your chosen frequency.</span>
                 </span>
             </h3>
-            <p style="font-size:0.82em;color:var(--muted);margin:0 0 16px;">Automatically imports new Amazon orders from your Gmail.</p>
-            <div style="display:grid;grid-template-columns:1fr 1fr;gap:12px;align-items:end;">
+            <p class="f-desc">Automatically imports new Amazon orders from your Gmail.</p>
+            <div class="f-grid2 f-end">
                 <div>
-                    <label style="font-size:0.78em;color:var(--muted);font-weight:600;text-transform:uppercase;letter-spacing:0.04em;display:block;margin-bottom:6px;">Auto-Import</label>
-                    <select name="auto_import">
-                        <option value="1" {{ 'selected' if settings.auto_import_orders }}>On</option>
-                        <option value="0" {{ 'selected' if not settings.auto_import_orders }}>Off</option>
-                    </select>
+                    <label class="f-label">Auto-Import</label>
+                    <select name="auto_import">{{ options.auto_import }}</select>
                 </div>
                 <div>
-                    <label style="font-size:0.78em;color:var(--muted);font-weight:600;text-transform:uppercase;letter-spacing:0.04em;display:block;margin-bottom:6px;">Check Frequency</label>
-                    <select name="import_frequency">
-                        <option value="every_6h" {{ 'selected' if (settings.import_frequency or '') == 'every_6h' }}>Every 6 hours</option>
-                        <option value="every_12h" {{ 'selected' if (settings.import_frequency or 'every_12h') == 'every_12h' }}>Every 12 hours</option>
-                        <option value="daily" {{ 'selected' if (settings.import_frequency or '') == 'daily' }}>Once daily</option>
-                    </select>
+                    <label class="f-label">Check Frequency</label>
+                    <select name="import_frequency">{{ options.import_frequency }}</select>
                 </div>
             </div>
-            <p style="font-size:0.78em;color:var(--muted);margin:10px 0 0;">Last import: {{ settings.last_email_scan.strftime('%b %d, %I:%M %p') if settings.last_email_scan else 'Never' }} · Recommended: every 12 hours catches orders within the same day.</p>
+            <p class="f-hint">Last import: {{ settings.last_email_scan.strftime('%b %d, %I:%M %p') if settings.last_email_scan else 'Never' }} · Recommended: every 12 hours catches orders within the same day.</p>
         </div>
         
         <!-- Tracking Duration -->
         <div class="card">
-            <h3 style="margin:0 0 4px;font-size:1em;font-weight:700;">⏱️ Tracking Duration</h3>
-            <p style="font-size:0.82em;color:var(--muted);margin:0 0 16px;">How long to monitor prices after purchase.</p>
-            <div style="display:grid;grid-template-columns:1fr 1fr;gap:12px;">
+            <h3 class="f-title">⏱️ Tracking Duration</h3>
+            <p class="f-desc">How long to monitor prices after purchase.</p>
+            <div class="f-grid2">
                 <div>
-                    <label style="font-size:0.78em;color:var(--muted);font-weight:600;text-transform:uppercase;letter-spacing:0.04em;display:block;margin-bottom:6px;">Track for (days)</label>
+                    <label class="f-label">Track for (days)</label>
                     <input type="number" name="expiration_days" value="{{ settings.default_expiration_days }}" min="0" max="365">
                 </div>
                 <div>
-                    <label style="font-size:0.78em;color:var(--muted);font-weight:600;text-transform:uppercase;letter-spacing:0.04em;display:block;margin-bottom:6px;">Auto-Archive Expired</label>
-                    <select name="auto_archive"><option value="1" {{ 'selected' if settings.auto_archive }}>On</option><option value="0" {{ 'selected' if not settings.auto_archive }}>Off</option></select>
+                    <label class="f-label">Auto-Archive Expired</label>
+                    <select name="auto_archive">{{ options.auto_archive }}</select>
                 </div>
             </div>
-            <p style="font-size:0.78em;color:var(--muted);margin:10px 0 0;">For email-imported orders: expires X days from <strong>order date</strong> (covers the return window). For manual items: X days from when added. Set 0 for no expiration.</p>
+            <p class="f-hint">For email-imported orders: expires X days from <strong>order date</strong> (covers the return window). For manual items: X days from when added. Set 0 for no expiration.</p>
         </div>
         
         <!-- Check Interval -->
         <div class="card">
-            <h3 style="margin:0 0 4px;font-size:1em;font-weight:700;display:flex;align-items:center;gap:8px;">🔄 Price Check Interval
+            <h3 class="f-title">🔄 Price Check Interval
                 <span class="tooltip"><span class="info-icon">i</span>
                     <span class="tooltip-text"><strong>Bot Detection Prevention</strong><br><br>The actual check time is randomized by ±{{ jitter }} minutes around your base interval. This creates a {{ min_hours }}-{{ max_hours }} hour window that looks more human-like to Amazon.</span>
                 </span>
             </h3>
-            <p style="font-size:0.82em;color:var(--muted);margin:0 0 16px;">How often to scrape Amazon for price changes.</p>
-            <div style="display:grid;grid-template-columns:1fr 1fr;gap:12px;align-items:end;">
+            <p class="f-desc">How often to scrape Amazon for price changes.</p>
+            <div class="f-grid2 f-end">
                 <div>
-                    <label style="font-size:0.78em;color:var(--muted);font-weight:600;text-transform:uppercase;letter-spacing:0.04em;display:block;margin-bottom:6px;">Base Interval (minutes)</label>
+                    <label class="f-label">Base Interval (minutes)</label>
                     <input type="number" name="check_interval" value="{{ settings.check_interval_minutes }}" min="60" max="1440">
                 </div>
                 <div style="font-size:0.82em;color:var(--muted);padding-bottom:12px;font-family:'JetBrains Mono','DM Sans',monospace;">{{ min_hours }}–{{ max_hours }} hrs<br><span style="font-size:0.9em;">randomized</span></div>
@@ -946,74 +1218,70 @@ SETTINGS_TPL = """
         
         <!-- Global Alerts -->
         <div class="card">
-            <h3 style="margin:0 0 4px;font-size:1em;font-weight:700;display:flex;align-items:center;gap:8px;">🔔 Global Alert Thresholds
+            <h3 class="f-title">🔔 Global Alert Thresholds
                 <span class="tooltip"><span class="info-icon">i</span>
                     <span class="tooltip-text"><strong>Global Thresholds</strong><br><br>When enabled, these thresholds apply to ALL products, overriding individual settings. Great for "alert me if anything drops 10%".</span>
                 </span>
             </h3>
-            <p style="font-size:0.82em;color:var(--muted);margin:0 0 16px;">Apply the same alert rules to every tracked product.</p>
-            <div style="display:flex;gap:12px;align-items:center;margin-bottom:16px;">
-                <label style="margin:0;font-size:0.85em;font-weight:600;white-space:nowrap;">Enable</label>
-                <select name="global_alerts_enabled" style="width:80px;"><option value="0" {{ 'selected' if not settings.global_alerts_enabled }}>Off</option><option value="1" {{ 'selected' if settings.global_alerts_enabled }}>On</option></select>
+            <p class="f-desc">Apply the same alert rules to every tracked product.</p>
+            <div class="f-inline" style="margin-bottom:16px;">
+                <label>Enable</label>
+                <select name="global_alerts_enabled" style="width:80px;">{{ options.global_alerts_enabled }}</select>
             </div>
             <div style="opacity:{{ '1' if settings.global_alerts_enabled else '0.45' }};transition:opacity 0.2s;">
-                <div style="display:grid;grid-template-columns:1fr 1fr;gap:12px;">
-                    <div><label style="font-size:0.78em;color:var(--muted);font-weight:600;text-transform:uppercase;letter-spacing:0.04em;display:block;margin-bottom:6px;">New Drop %</label>
+                <div class="f-grid2">
+                    <div><label class="f-label">New Drop %</label>
                     <input type="number" name="global_new_pct" value="{{ settings.global_new_pct if settings.global_new_pct else '' }}" placeholder="e.g. 10" step="0.1" min="0"></div>
-                    <div><label style="font-size:0.78em;color:var(--muted);font-weight:600;text-transform:uppercase;letter-spacing:0.04em;display:block;margin-bottom:6px;">New Drop $</label>
+                    <div><label class="f-label">New Drop $</label>
                     <input type="number" name="global_new_dollars" value="{{ settings.global_new_dollars if settings.global_new_dollars else '' }}" placeholder="e.g. 5.00" step="0.01" min="0"></div>
-                    <div><label style="font-size:0.78em;color:var(--muted);font-weight:600;text-transform:uppercase;letter-spacing:0.04em;display:block;margin-bottom:6px;">Used Drop %</label>
+                    <div><label class="f-label">Used Drop %</label>
                     <input type="number" name="global_used_pct" value="{{ settings.global_used_pct if settings.global_used_pct else '' }}" placeholder="e.g. 15" step="0.1" min="0"></div>
-                    <div><label style="font-size:0.78em;color:var(--muted);font-weight:600;text-transform:uppercase;letter-spacing:0.04em;display:block;margin-bottom:6px;">Used Drop $</label>
+                    <div><label class="f-label">Used Drop $</label>
                     <input type="number" name="global_used_dollars" value="{{ settings.global_used_dollars if settings.global_used_dollars else '' }}" placeholder="e.g. 10.00" step="0.01" min="0"></div>
                 </div>
-                <p style="font-size:0.78em;color:var(--muted);margin:10px 0 0;">Drop calculated from purchase price (or highest tracked price if none set). Alert fires if ANY condition is met.</p>
+                <p class="f-hint">Drop calculated from purchase price (or highest tracked price if none set). Alert fires if ANY condition is met.</p>
             </div>
         </div>
         
         <!-- Recall Scanner -->
         <div class="card">
-            <h3 style="margin:0 0 4px;font-size:1em;font-weight:700;display:flex;align-items:center;gap:8px;">🛡️ Recall Monitor
+            <h3 class="f-title">🛡️ Recall Monitor
                 <span class="tooltip"><span class="info-icon">i</span>
                     <span class="tooltip-text"><strong>Multi-Source Recall Monitoring</strong><br><br>Checks two federal databases: CPSC (consumer products) and openFDA (food, drugs, health devices) for recalls matching your tracked products. Checks ALL products including archived — recalls don't expire.</span>
                 </span>
             </h3>
-            <p style="font-size:0.82em;color:var(--muted);margin:0 0 16px;">Checks CPSC + FDA databases for safety recalls on all your purchases.</p>
-            <div style="display:grid;grid-template-columns:1fr 1fr;gap:12px;">
+            <p class="f-desc">Checks CPSC + FDA databases for safety recalls on all your purchases.</p>
+            <div class="f-grid2">
                 <div>
-                    <label style="font-size:0.78em;color:var(--muted);font-weight:600;text-transform:uppercase;letter-spacing:0.04em;display:block;margin-bottom:6px;">Recall Scanning</label>
-                    <select name="recall_scan_enabled"><option value="1" {{ 'selected' if settings.recall_scan_enabled }}>On</option><option value="0" {{ 'selected' if not settings.recall_scan_enabled }}>Off</option></select>
+                    <label class="f-label">Recall Scanning</label>
+                    <select name="recall_scan_enabled">{{ options.recall_scan_enabled }}</select>
                 </div>
                 <div>
-                    <label style="font-size:0.78em;color:var(--muted);font-weight:600;text-transform:uppercase;letter-spacing:0.04em;display:block;margin-bottom:6px;">Scan Frequency</label>
-                    <select name="recall_scan_frequency">
-                        <option value="every_check" {{ 'selected' if settings.recall_scan_frequency == 'every_check' }}>Every price check</option>
-                        <option value="daily" {{ 'selected' if settings.recall_scan_frequency == 'daily' }}>Daily</option>
-                        <option value="weekly" {{ 'selected' if settings.recall_scan_frequency == 'weekly' }}>Weekly</option>
-                    </select>
+                    <label class="f-label">Scan Frequency</label>
+                    <select name="recall_scan_frequency">{{ options.recall_scan_frequency }}</select>
                 </div>
             </div>
-            <p style="font-size:0.78em;color:var(--muted);margin:10px 0 0;">Last scan: {{ settings.last_recall_scan.strftime('%b %d, %I:%M %p') if settings.last_recall_scan else 'Never' }} · Monitors indefinitely, even archived products.</p>
+            <p class="f-hint">Last scan: {{ settings.last_recall_scan.strftime('%b %d, %I:%M %p') if settings.last_recall_scan else 'Never' }} · Monitors indefinitely, even archived products.</p>
         </div>
         
         <!-- Email Options -->
         <div class="card">
-            <h3 style="margin:0 0 4px;font-size:1em;font-weight:700;">📬 Email Options</h3>
-            <div style="display:flex;gap:12px;align-items:center;">
-                <label style="margin:0;font-size:0.85em;font-weight:600;white-space:nowrap;">Batch Alerts</label>
-                <select name="batch_email_alerts" style="width:80px;"><option value="0" {{ 'selected' if not settings.batch_email_alerts }}>Off</option><option value="1" {{ 'selected' if settings.batch_email_alerts }}>On</option></select>
+            <h3 class="f-title">📬 Email Options</h3>
+            <div class="f-inline">
+                <label>Batch Alerts</label>
+                <select name="batch_email_alerts" style="width:80px;">{{ options.batch_email_alerts }}</select>
             </div>
-            <p style="font-size:0.78em;color:var(--muted);margin:10px 0 0;">When on, groups multiple price drops into a single email instead of one per product.</p>
+            <p class="f-hint">When on, groups multiple price drops into a single email instead of one per product.</p>
         </div>
         
         <!-- Startup -->
         <div class="card">
-            <h3 style="margin:0 0 4px;font-size:1em;font-weight:700;">🚀 System</h3>
-            <div style="display:flex;gap:12px;align-items:center;">
-                <label style="margin:0;font-size:0.85em;font-weight:600;white-space:nowrap;">Run at Windows Startup</label>
-                <select name="run_at_startup" style="width:80px;"><option value="0" {{ 'selected' if not settings.run_at_startup }}>Off</option><option value="1" {{ 'selected' if settings.run_at_startup }}>On</option></select>
+            <h3 class="f-title">🚀 System</h3>
+            <div class="f-inline">
+                <label>Run at Windows Startup</label>
+                <select name="run_at_startup" style="width:80px;">{{ options.run_at_startup }}</select>
             </div>
-            <p style="font-size:0.78em;color:var(--muted);margin:10px 0 0;">When on, the tracker starts automatically when you log into Windows. Runs silently in the system tray.</p>
+            <p class="f-hint">When on, the tracker starts automatically when you log into Windows. Runs silently in the system tray.</p>
         </div>
         
         <button class="btn btn-primary" style="width:100%;padding:12px;font-size:0.95em;">💾 Save All Settings</button>
@@ -1023,7 +1291,7 @@ SETTINGS_TPL = """
 """
 
 RECALLS_TPL = """
-{% extends "layout" %}
+{% extends "layout.html" %}
 {% block content %}
 <div class="section-header">
     <h2>🛡️ Product Recall Monitor</h2>
@@ -1159,58 +1427,59 @@ class Product(Base):
     recall_date = Column(String, nullable=True)
     recall_consumer_contact = Column(String, nullable=True)
     last_recall_check = Column(DateTime, nullable=True)
+    __table_args__ = (
+        Index('ix_products_archived_active', 'is_archived', 'is_active'),  # Cycle/dashboard product list
+        Index('ix_products_archived_at', 'is_archived', 'archived_at'),  # Archive page ordering
+        Index('ix_products_recall_status', 'recall_status'),  # Recalls page: only matched/dismissed rows
+    )
+    
+    _history_cache = None  # (raw JSON it was parsed from, parsed list); a new column value invalidates it
     
     def get_price_history(self):
-        try: return json.loads(self.price_history_json or "[]")
-        except: return []
+        raw = self.price_history_json or "[]"
+        cached = self._history_cache
+        if cached is not None and cached[0] is raw: return cached[1]
+        try: h = json_loads(raw)
+        except: h = []
+        self._history_cache = (raw, h)
+        return h
     
     def add_price_point(self, new_price=None, used_price=None):
         h = self.get_price_history()
         h.append({'date': datetime.now().strftime('%m/%d %H:%M'), 'new': new_price, 'used': used_price})
         if len(h) > MAX_PRICE_HISTORY: h = h[-MAX_PRICE_HISTORY:]
-        self.price_history_json = json.dumps(h)
+        self.price_history_json = json_dumps(h)
+        self._history_cache = (self.price_history_json, h)
+    
+    @staticmethod
+    def _should_alert(price, ref_price, pct_threshold, dollars_threshold):
+        """True if price is at least pct_threshold % or dollars_threshold $ below ref_price (either is enough)."""
+        if not ref_price or ref_price <= 0: return False
+        drop = ref_price - price
+        if dollars_threshold and drop >= dollars_threshold: return True
+        # drop / ref * 100 >= pct, multiplied through by ref (> 0) to skip the division
+        return bool(pct_threshold) and drop * 100 >= pct_threshold * ref_price
     
     def should_alert_new(self, new_price, global_pct=None, global_dollars=None):
         """Check if new price drop should trigger alert. Uses purchase_price as reference, falls back to highest_new_price.
         Requires at least one prior price check to prevent false positives on first scrape."""
-        if not new_price: return False
         # Must have a previous check to compare against — first scrape establishes baseline only
-        if not self.last_checked: return False
+        if not new_price or not self.last_checked: return False
         # Reference price: purchase price, or highest tracked price, or previous price
-        ref_price = self.purchase_price or self.highest_new_price or self.prev_new_price
-        if not ref_price or ref_price <= 0: return False
-        
         # Use global thresholds if provided, otherwise use per-item
-        pct_threshold = global_pct if global_pct is not None else self.alert_new_pct
-        dollars_threshold = global_dollars if global_dollars is not None else self.alert_new_dollars
-        
-        if pct_threshold:
-            drop_pct = (ref_price - new_price) / ref_price * 100
-            if drop_pct >= pct_threshold: return True
-        if dollars_threshold:
-            if ref_price - new_price >= dollars_threshold: return True
-        return False
+        return self._should_alert(new_price, self.purchase_price or self.highest_new_price or self.prev_new_price,
+                                  global_pct if global_pct is not None else self.alert_new_pct,
+                                  global_dollars if global_dollars is not None else self.alert_new_dollars)
     
     def should_alert_used(self, used_price, global_pct=None, global_dollars=None):
         """Check if used price drop should trigger alert. 
         Reference: highest_used_price (tracks actual used market), then purchase_price, then prev."""
-        if not used_price: return False
         # Must have a previous check to compare against — first scrape establishes baseline only
-        if not self.last_checked: return False
+        if not used_price or not self.last_checked: return False
         # For used prices, reference the used price history first — purchase_price was for NEW condition
-        ref_price = self.highest_used_price or self.purchase_price or self.prev_used_price
-        if not ref_price or ref_price <= 0: return False
-        
-        # Use global thresholds if provided, otherwise use per-item
-        pct_threshold = global_pct if global_pct is not None else self.alert_used_pct
-        dollars_threshold = global_dollars if global_dollars is not None else self.alert_used_dollars
-        
-        if pct_threshold:
-            drop_pct = (ref_price - used_price) / ref_price * 100
-            if drop_pct >= pct_threshold: return True
-        if dollars_threshold:
-            if ref_price - used_price >= dollars_threshold: return True
-        return False
+        return self._should_alert(used_price, self.highest_used_price or self.purchase_price or self.prev_used_price,
+                                  global_pct if global_pct is not None else self.alert_used_pct,
+                                  global_dollars if global_dollars is not None else self.alert_used_dollars)
     
     def get_drop_info(self, price_type='new'):
         """Get drop info (pct, dollars) for display. Returns (drop_pct, drop_dollars, ref_price) or (None, None, None)"""
@@ -1260,84 +1529,295 @@ class Product(Base):
             self.last_checked = datetime.now()
         return updated
 
-engine = create_engine(f'sqlite:///{DB_NAME}', echo=False)
+# Pooled connections shared by Flask, scraper and scheduler threads (SQLite defaults to per-thread connections)
+engine = create_engine(f'sqlite:///{DB_NAME}', echo=False,
+                       connect_args={'check_same_thread': False, 'timeout': 30},
+                       poolclass=QueuePool, pool_size=8, max_overflow=16, pool_pre_ping=True)
+
+@event.listens_for(engine, "connect")
+def _configure_sqlite(dbapi_conn, _record):
+    """Per-connection tuning: WAL lets readers run during a scrape write, the rest keeps hot pages in memory."""
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA mmap_size=268435456")
+    cur.execute("PRAGMA cache_size=-65536")
+    cur.close()
+
 Base.metadata.create_all(engine)  # Create tables first
 migrate_database()  # Then add missing columns to existing tables
+for _idx in Product.__table__.indexes: _idx.create(engine, checkfirst=True)  # create_all skips indexes on existing tables
 os.makedirs(os.path.join(os.getcwd(), 'static', 'screenshots'), exist_ok=True)
 # Ensure default settings row exists
-ScopedSession = scoped_session(sessionmaker(bind=engine))
-with ScopedSession() as _init_s:
+# Plain factory, not scoped_session: every get_session() owns its session and closes it,
+# so pooled worker threads never keep a thread-local session (and its transaction) alive
+SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+
+# Bumped whenever a commit actually wrote something; the dashboard ETag is built on it
+data_generation = 0
+_generation_lock = threading.Lock()  # += isn't atomic; two commits must never collapse into one bump
+PROCESS_TOKEN = time.time_ns()  # data_generation restarts at 0 every launch
+
+def data_version(generation):
+    """Cache key for the DB contents as of `generation`, never equal to one from an earlier launch."""
+    return f"{PROCESS_TOKEN}.{generation}"
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_written(sess, _ctx):
+    sess.info['wrote'] = True
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _mark_bulk_written(state):
+    if state.is_update or state.is_delete: state.session.info['wrote'] = True
+
+@event.listens_for(SessionLocal, "after_commit")
+def _bump_generation(sess):
+    global data_generation
+    if sess.info.pop('wrote', False):
+        with _generation_lock:
+            data_generation += 1
+
+with SessionLocal() as _init_s:
     if not _init_s.query(Settings).first():
         _init_s.add(Settings())
         _init_s.commit()
 
+def elapsed_since(local_dt):
+    """Real time elapsed since a naive local timestamp from the DB. Both ends are made offset-aware, so a DST
+    change between them doesn't add or drop an hour (stored values and the UI stay in local time)."""
+    return datetime.now().astimezone() - local_dt.astimezone()
+
 @contextmanager
 def get_session():
-    s = ScopedSession()
+    s = SessionLocal()
     try: yield s; s.commit()
     except: s.rollback(); raise
-    finally: ScopedSession.remove()
+    finally: s.close()
 
 def init_db():
     """Legacy init — settings row now created at module load. Kept for compatibility."""
     pass
 
 ASIN_RE = re.compile(r'/(?:dp|gp/product|gp/aw/d)/([A-Z0-9]{10})(?:[/?]|$)', re.I)
-BARE_ASIN_RE = re.compile(r'^[A-Z0-9]{10}$', re.I)
+PRICE_RE = re.compile(r'\$(\d{1,3}(?:,\d{3})*\.\d{2})')
+PRICE_STRIP = str.maketrans('', '', ',')  # Thousands separators, dropped in one C-level pass
+# Raw-HTML fallbacks for the new price when no selector matched
+NEW_PRICE_FALLBACK_RES = (re.compile(r'"priceAmount":\s*(\d+\.?\d*)'), re.compile(r'\$(\d{1,5}\.\d{2})\s*</span>'))
+# "Used (12) from $34.99" / "Used from $34.99" on offer listings
+USED_FROM_RES = (re.compile(r'Used\s*\([^)]*\)\s*from\s*\$(\d+\.\d{2})', re.I), re.compile(r'Used\s+from\s+\$(\d+\.\d{2})', re.I))
+# Offer-heading conditions that mean a used listing ("very good" is covered by "good"), one search per heading
+USED_CONDITION_RE = re.compile(r'used|renewed|refurbished|acceptable|good|like new')
 def extract_asin(url):
     if not url: return None
     url = url.strip()
-    # Accept bare ASINs like "B08N5WRWNW"
-    if BARE_ASIN_RE.match(url):
+    # Accept bare ASINs like "B08N5WRWNW" (string checks, no regex pass needed)
+    if len(url) == 10 and url.isascii() and url.isalnum():
         return url.upper()
     m = ASIN_RE.search(url)
     return m.group(1).upper() if m else None
 
 def parse_price(text):
     if not text: return None
-    m = re.search(r'\$(\d{1,3}(?:,\d{3})*\.\d{2})', text)
+    m = PRICE_RE.search(text)
     if m:
         try:
-            p = float(m.group(1).replace(',', ''))
+            p = float(m.group(1).translate(PRICE_STRIP))
             if 1.00 <= p <= 100000: return p
         except: pass
     return None
 
-MAX_LOG_SIZE = 1_000_000  # 1MB per log file
+class _SoupNode:
+    """Selectolax-style wrapper around a BeautifulSoup node — used only when selectolax isn't installed."""
+    __slots__ = ('_node',)
+    def __init__(self, node): self._node = node
+    def css_first(self, selector):
+        node = self._node.select_one(selector)
+        return _SoupNode(node) if node is not None else None
+    def css(self, selector): return [_SoupNode(n) for n in self._node.select(selector)]
+    def text(self): return self._node.get_text()
 
-def _rotate_log(log_file):
-    """Rotate log file if it exceeds MAX_LOG_SIZE. Keeps one backup."""
+def parse_html(html):
+    """Parse a page with selectolax (C parser); fall back to BeautifulSoup with lxml, then html.parser.
+    Returned nodes support css_first(), css() and text()."""
+    if SELECTOLAX_AVAILABLE:
+        return HTMLParser(html)
     try:
-        if os.path.exists(log_file) and os.path.getsize(log_file) > MAX_LOG_SIZE:
-            backup = log_file + '.old'
-            if os.path.exists(backup):
-                os.remove(backup)
-            os.rename(log_file, backup)
-    except: pass
+        return _SoupNode(BeautifulSoup(html, 'lxml'))
+    except Exception:
+        return _SoupNode(BeautifulSoup(html, 'html.parser'))
+
+MAX_LOG_SIZE = 1_000_000  # 1MB per log file
+
+_activity_log_lock = threading.Lock()
+
+def activity_log(filename):
+    """log(msg) for an activity file (import/recall/check): '[time] msg' lines in a rotating file, plus the main log.
+    The handler stays open and counts bytes itself, so there's no open/stat per line. Keeps one <file>.old backup."""
+    log = logging.getLogger(f"{__name__}.{filename.rsplit('.', 1)[0]}")
+    with _activity_log_lock:
+        if not log.handlers:
+            try:
+                handler = RotatingFileHandler(os.path.join(os.getcwd(), filename), maxBytes=MAX_LOG_SIZE, backupCount=1,
+                                              encoding='utf-8', delay=True)
+                handler.namer = lambda name: name[:-2] + '.old'  # <file>.1 -> <file>.old
+                handler.setFormatter(logging.Formatter('[%(asctime)s] %(message)s', '%Y-%m-%d %H:%M:%S'))
+                log.addHandler(handler)
+            except: pass
+    return log.info
 
 # ============================================================
 # GMAIL ORDER SCANNER - FIXED
 # ============================================================
 
+IMAP_FETCH_BATCH = 100  # Messages per FETCH round-trip; much past this and Gmail starts throttling
+IMAP_FETCH_RETRIES = 3
+IMAP_TIMEOUT = 30  # Socket timeout for the IMAP connection, seconds
+
+def imap_fetch_batched(mail, msg_ids, parts='(RFC822)', log=logger.info):
+    """Yield (msg_id, data) per message, IMAP_FETCH_BATCH per FETCH; failed batches retry with backoff, then skip."""
+    for i in range(0, len(msg_ids), IMAP_FETCH_BATCH):
+        chunk, data = msg_ids[i:i + IMAP_FETCH_BATCH], []
+        for attempt in range(IMAP_FETCH_RETRIES):
+            try:
+                status, data = mail.fetch(b','.join(chunk), parts)
+                if status != 'OK': raise imaplib.IMAP4.error(f"FETCH returned {status}")
+                break
+            except imaplib.IMAP4.abort: raise  # Connection is gone, retrying on it can't help
+            except imaplib.IMAP4.error as e:
+                data = []
+                if attempt == IMAP_FETCH_RETRIES - 1: log(f"FETCH failed for {len(chunk)} messages: {e}")
+                else: time.sleep(2 ** attempt + random.random())
+        # A second part of a message arrives as (b' PART {size}', bytes); parts are joined header-first
+        msg_id, literals = None, []
+        for item in data:
+            if not isinstance(item, tuple): continue
+            if item[0][:1].isdigit():
+                if msg_id is not None: yield msg_id, b''.join(literals)
+                msg_id, literals = item[0].split(None, 1)[0], []
+            if b'HEADER' in item[0]: literals.insert(0, item[1])
+            else: literals.append(item[1])
+        if msg_id is not None: yield msg_id, b''.join(literals)
+
+# Just the headers the parser reads plus the body; header fields + TEXT still parse as one message
+ORDER_FETCH_PARTS = '(BODY.PEEK[HEADER.FIELDS (SUBJECT DATE MIME-VERSION CONTENT-TYPE CONTENT-TRANSFER-ENCODING)] BODY.PEEK[TEXT])'
+
+_PREFETCH_DONE = object()
+
+def prefetched(iterable, depth=IMAP_FETCH_BATCH):
+    """Iterate `iterable` on a background thread, at most `depth` items ahead, so the next FETCH overlaps parsing."""
+    q, stop = queue.Queue(maxsize=depth), threading.Event()
+    def put(item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full: pass
+        return False
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item): return  # Consumer gave up
+            put(_PREFETCH_DONE)
+        except BaseException as e:
+            put(e)
+    producer = threading.Thread(target=produce, name='imap-prefetch', daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _PREFETCH_DONE: return
+            if isinstance(item, BaseException): raise item
+            yield item
+    finally:
+        # imaplib isn't thread-safe: let an in-flight FETCH finish before the caller touches the connection
+        stop.set()
+        producer.join(IMAP_TIMEOUT + 5)
+
+ORDER_SKIP_RE = re.compile(r'shipped|delivered|refund|return|cancel|arriving|problem')
+
+# Order-email patterns, compiled once. ORDER_ID_RE / ORDER_ASIN_RE are bytes patterns run on the raw message;
+# the body scans use RE2 (linear time, inline flags) when installed
+_body_re = re2 if RE2_AVAILABLE else re
+ORDER_ID_RE = _body_re.compile(rb'(\d{3}-\d{7}-\d{7})')
+SUBJECT_ORDERED_RE = re.compile(r'Ordered:\s*(.+)', re.I)
+SUBJECT_ORDER_OF_RE = re.compile(r'order\s+of\s+(.+)', re.I)
+NAME_LEADING_QTY_RE = re.compile(r'^\d+\s+')
+NAME_MORE_ITEMS_RE = re.compile(r'\s*and\s+\d+\s+more\s+items?.*$', re.I)
+NAME_TRAILING_DOTS_RE = re.compile(r'\.{2,}$')
+# Ordered-item link (fed_asin / i_fed / t_fed ref, not a recommendation) or a plain /dp/ link, in one alternation
+ORDER_ASIN_RE = _body_re.compile(rb'(?i)dp%2F(?P<enc>[A-Z0-9]{10})%3F[^&]*(?:fed_asin|[it]_fed)|/dp/(?P<plain>[A-Z0-9]{10})')
+DP_ASIN_RE = _body_re.compile(r'(?i)/dp/([A-Z0-9]{10})')
+# Quantity (with the per-item "N price USD" form), Grand Total and bare $ amounts from an order email's text part.
+# (a leading $ still makes it the Grand Total, not a bare amount)
+ORDER_AMOUNTS_RE = _body_re.compile(r'Quantity:\s*(?P<qty>\d+)(?:\s+(?P<qty_price>[\d.]+)\s*USD)?'
+                                    r'|\$?\s*(?P<total>[\d.]+)\s*USD\s*Grand\s*Total'
+                                    r'|\$\s*(?P<dollar>[\d.]+)')
+
+def decode_subject(subject_raw):
+    subject = ''
+    try:
+        for part, encoding in decode_header(subject_raw):
+            if isinstance(part, bytes):
+                subject += part.decode(encoding or 'utf-8', errors='ignore')
+            else:
+                subject += str(part)
+    except:
+        subject = str(subject_raw)
+    return subject
+
+def parse_order_email(raw_email):
+    """Return (subject, date_str, plain_text) for a fetched message; fast_mail_parser when installed, else stdlib."""
+    if FAST_MAIL_PARSER_AVAILABLE:
+        try:
+            pm = fast_parse_email(raw_email)
+            # Date and multipart-ness from the stdlib header parser, so both paths agree
+            headers = BytesHeaderParser().parsebytes(raw_email)
+            plain_text = pm.text_plain[0] if pm.text_plain and headers.get_content_maintype() == 'multipart' else ''
+            return pm.subject or '', headers.get('Date', ''), plain_text
+        except Exception:
+            pass  # Malformed MIME: fall through to the more forgiving stdlib parser
+    msg = email_lib.message_from_bytes(raw_email)
+    plain_text = ""
+    if msg.is_multipart():
+        for part in msg.walk():
+            if part.get_content_type() == 'text/plain':
+                try:
+                    payload = part.get_payload(decode=True)
+                    if payload:
+                        plain_text = payload.decode('utf-8', errors='ignore')
+                        break
+                except:
+                    pass
+    return decode_subject(msg.get('Subject', '')), msg.get('Date', ''), plain_text
+
+def is_order_subject(subject_lower):
+    # "Ordered:" = shipment confirmation, "Your Amazon.com order" = instant confirmation;
+    # shipment/delivery/refund notifications are skipped
+    if 'ordered' not in subject_lower and 'your amazon.com order' not in subject_lower:
+        return False
+    return not ORDER_SKIP_RE.search(subject_lower)
+
+IMAP_HOST = 'imap.gmail.com'
+
+@contextmanager
+def imap_session(email_address, email_password):
+    """Logged-in Gmail IMAP connection for one scan, logged out afterwards (errors included)."""
+    mail = imaplib.IMAP4_SSL(IMAP_HOST, timeout=IMAP_TIMEOUT)
+    try:
+        mail.login(email_address, email_password)
+        yield mail
+    finally:
+        try: mail.logout()
+        except: pass
+
 def scan_amazon_orders(email_address, email_password, days_back=32):
     """Scan Gmail for Amazon order confirmations - extracts ASIN directly from email (no Amazon search needed)"""
     found_products = []
     debug_info = []
     seen_order_ids = set()
     
-    # Create import log
-    log_file = os.path.join(os.getcwd(), 'import_log.txt')
-    _rotate_log(log_file)
-    
-    def log(msg):
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        line = f"[{timestamp}] {msg}"
-        logger.info(msg)
-        try:
-            with open(log_file, 'a') as f:
-                f.write(line + '\n')
-        except:
-            pass
+    log = activity_log('import_log.txt')
     
     log("="*60)
     log("STARTING EMAIL IMPORT")
@@ -1345,236 +1825,225 @@ def scan_amazon_orders(email_address, email_password, days_back=32):
     
     try:
         log("Connecting to Gmail IMAP...")
-        mail = imaplib.IMAP4_SSL('imap.gmail.com')
-        mail.login(email_address, email_password)
-        log("Login successful")
-        
-        status, count = mail.select('INBOX')
-        inbox_count = count[0].decode() if count else '?'
-        log(f"INBOX has {inbox_count} messages")
-        debug_info.append("Connected")
-        
-        since_date = (datetime.now() - timedelta(days=days_back)).strftime('%d-%b-%Y')
-        log(f"Searching for orders since {since_date}")
-        
-        # Search for order confirmation emails
-        # "Ordered:" = shipment/processing emails (arrive hours/days later)
-        # "Your Amazon.com order" = immediate order confirmation (arrives instantly)
-        search_queries = [
-            f'(SUBJECT "Ordered:" FROM "amazon" SINCE {since_date})',
-            f'(FROM "auto-confirm@amazon.com" SUBJECT "Ordered" SINCE {since_date})',
-            f'(SUBJECT "Your Amazon.com order" FROM "amazon" SINCE {since_date})',
-            f'(FROM "auto-confirm@amazon.com" SUBJECT "order of" SINCE {since_date})',
-        ]
+        with imap_session(email_address, email_password) as mail:
+            log("Login successful")
         
-        all_email_ids = set()
-        for query in search_queries:
+            status, count = mail.select('INBOX')
+            inbox_count = count[0].decode() if count else '?'
+            log(f"INBOX has {inbox_count} messages")
+            debug_info.append("Connected")
+        
+            since_date = (datetime.now() - timedelta(days=days_back)).strftime('%d-%b-%Y')
+            log(f"Searching for orders since {since_date}")
+        
+            # Search for order confirmation emails
+            # "Ordered:" = shipment/processing emails (arrive hours/days later)
+            # "Your Amazon.com order" = immediate order confirmation (arrives instantly)
+            search_queries = [
+                f'(SUBJECT "Ordered:" FROM "amazon" SINCE {since_date})',
+                f'(FROM "auto-confirm@amazon.com" SUBJECT "Ordered" SINCE {since_date})',
+                f'(SUBJECT "Your Amazon.com order" FROM "amazon" SINCE {since_date})',
+                f'(FROM "auto-confirm@amazon.com" SUBJECT "order of" SINCE {since_date})',
+            ]
+        
+            # One SEARCH round-trip: IMAP OR is binary, so nest the queries
+            combined_query = search_queries[0]
+            for query in search_queries[1:]:
+                combined_query = f'(OR {combined_query} {query})'
+        
+            all_email_ids = set()
             try:
-                status, data = mail.search(None, query)
-                if status == 'OK' and data[0]:
-                    ids = data[0].split()
-                    log(f"Query found {len(ids)} emails")
-                    all_email_ids.update(ids)
+                status, data = mail.search(None, combined_query)
+                if status != 'OK':
+                    raise imaplib.IMAP4.error(f"SEARCH returned {status}")
+                if data[0]:
+                    all_email_ids.update(data[0].split())
+                log(f"Combined query found {len(all_email_ids)} emails")
             except Exception as e:
-                log(f"Query error: {e}")
+                # Fall back to one SEARCH per query if the server rejects the nested OR
+                log(f"Combined query error ({e}), searching individually")
+                for query in search_queries:
+                    try:
+                        status, data = mail.search(None, query)
+                        if status == 'OK' and data[0]:
+                            ids = data[0].split()
+                            log(f"Query found {len(ids)} emails")
+                            all_email_ids.update(ids)
+                    except Exception as e:
+                        log(f"Query error: {e}")
         
-        log(f"Total unique emails to process: {len(all_email_ids)}")
-        debug_info.append(f"Emails={len(all_email_ids)}")
+            log(f"Total unique emails to process: {len(all_email_ids)}")
+            debug_info.append(f"Emails={len(all_email_ids)}")
         
-        orders_found = 0
-        no_asin = 0
-        duplicates = 0
+            orders_found = 0
+            no_asin = 0
+            duplicates = 0
         
-        for msg_id in list(all_email_ids)[:200]:
-            try:
-                _, msg_data = mail.fetch(msg_id, '(RFC822)')
-                raw_email = msg_data[0][1]
-                msg = email_lib.message_from_bytes(raw_email)
-                
-                # Get and decode subject
-                subject_raw = msg.get('Subject', '')
-                subject = ''
-                try:
-                    decoded_parts = decode_header(subject_raw)
-                    for part, encoding in decoded_parts:
-                        if isinstance(part, bytes):
-                            subject += part.decode(encoding or 'utf-8', errors='ignore')
-                        else:
-                            subject += str(part)
-                except:
-                    subject = str(subject_raw)
-                
-                subject_lower = subject.lower()
-                
-                # Skip if no order-related keyword in subject
-                # "Ordered:" = shipment confirmation, "Your Amazon.com order" = instant confirmation
-                if 'ordered' not in subject_lower and 'your amazon.com order' not in subject_lower:
-                    continue
-                
-                # Skip shipment/delivery/refund notifications
-                skip_keywords = ['shipped', 'delivered', 'refund', 'return', 'cancel', 'arriving', 'problem']
-                if any(kw in subject_lower for kw in skip_keywords):
-                    continue
-                
-                log(f"\n--- Processing: {subject[:60]}...")
-                
-                # Get email date
-                date_str = msg.get('Date', '')
-                email_date = datetime.now()
+            # Stage 1: Subject headers only, to drop shipment/refund mail before downloading any bodies
+            order_ids = []
+            for msg_id, header in imap_fetch_batched(mail, list(all_email_ids)[:200], '(BODY.PEEK[HEADER.FIELDS (SUBJECT)])', log=log):
+                subject = parse_order_email(header)[0]
+                if is_order_subject(subject.lower()): order_ids.append(msg_id)
+            log(f"Order confirmations by subject: {len(order_ids)}")
+        
+            # Stage 2: Parsed headers and body of the order confirmations
+            for msg_id, raw_email in prefetched(imap_fetch_batched(mail, order_ids, ORDER_FETCH_PARTS, log=log)):
                 try:
-                    email_date = parsedate_to_datetime(date_str).replace(tzinfo=None)
-                except:
-                    pass
+                    subject, date_str, plain_text = parse_order_email(raw_email)
+                    subject_lower = subject.lower()
                 
-                # Get raw email content
-                raw_text = raw_email.decode('utf-8', errors='ignore')
+                    log(f"\n--- Processing: {subject[:60]}...")
                 
-                # Extract plain text body for price/quantity parsing
-                plain_text = ""
-                if msg.is_multipart():
-                    for part in msg.walk():
-                        if part.get_content_type() == 'text/plain':
-                            try:
-                                payload = part.get_payload(decode=True)
-                                if payload:
-                                    plain_text = payload.decode('utf-8', errors='ignore')
-                                    break
-                            except:
-                                pass
+                    # Get email date
+                    email_date = datetime.now()
+                    try:
+                        email_date = parsedate_to_datetime(date_str).replace(tzinfo=None)
+                    except:
+                        pass
                 
-                # Get order ID - check for duplicates
-                order_id = None
-                order_match = re.search(r'(\d{3}-\d{7}-\d{7})', raw_text)
-                if order_match:
-                    order_id = order_match.group(1)
-                    log(f"  Order ID: {order_id}")
-                    if order_id in seen_order_ids:
-                        log(f"  SKIPPED: Duplicate order ID")
-                        duplicates += 1
-                        continue
-                    seen_order_ids.add(order_id)
+                    # Get order ID - check for duplicates
+                    order_id = None
+                    order_match = ORDER_ID_RE.search(raw_email)
+                    if order_match:
+                        order_id = order_match.group(1).decode('ascii')
+                        log(f"  Order ID: {order_id}")
+                        if order_id in seen_order_ids:
+                            log(f"  SKIPPED: Duplicate order ID")
+                            duplicates += 1
+                            continue
+                        seen_order_ids.add(order_id)
                 
-                # Extract product name from subject
-                product_name = None
-                # Pattern 1: "Ordered: [product]" (shipment confirmation)
-                match = re.search(r'Ordered:\s*(.+)', subject, re.I)
-                if match:
-                    raw_name = match.group(1).strip()
-                # Pattern 2: "Your Amazon.com order of [product]" (instant confirmation)
-                elif 'your amazon.com order' in subject_lower:
-                    match = re.search(r'order\s+of\s+(.+)', subject, re.I)
+                    # Extract product name from subject
+                    product_name = None
+                    # Pattern 1: "Ordered: [product]" (shipment confirmation)
+                    match = SUBJECT_ORDERED_RE.search(subject)
                     if match:
                         raw_name = match.group(1).strip()
+                    # Pattern 2: "Your Amazon.com order of [product]" (instant confirmation)
+                    elif 'your amazon.com order' in subject_lower:
+                        match = SUBJECT_ORDER_OF_RE.search(subject)
+                        if match:
+                            raw_name = match.group(1).strip()
+                        else:
+                            raw_name = None
                     else:
                         raw_name = None
-                else:
-                    raw_name = None
                 
-                if raw_name:
-                    raw_name = re.sub(r'^\d+\s+', '', raw_name)
-                    raw_name = raw_name.strip('"\'""''`')
-                    raw_name = re.sub(r'\s*and\s+\d+\s+more\s+items?.*$', '', raw_name, flags=re.I)
-                    raw_name = re.sub(r'\.{2,}$', '', raw_name).strip()
-                    raw_name = raw_name.strip('"\'""''`')
-                    if len(raw_name) >= 3:
-                        product_name = raw_name
-                        log(f"  Product name: {product_name[:50]}")
+                    if raw_name:
+                        raw_name = NAME_LEADING_QTY_RE.sub('', raw_name)
+                        raw_name = raw_name.strip('"\'""''`')
+                        raw_name = NAME_MORE_ITEMS_RE.sub('', raw_name)
+                        raw_name = NAME_TRAILING_DOTS_RE.sub('', raw_name).strip()
+                        raw_name = raw_name.strip('"\'""''`')
+                        if len(raw_name) >= 3:
+                            product_name = raw_name
+                            log(f"  Product name: {product_name[:50]}")
                 
-                # CRITICAL: Extract ASIN directly from email redirect URLs
-                # Pattern: dp%2F{ASIN}...fed_asin = ordered item (NOT recommendation)
-                # Recommendations have AGH3Col or dealz_cs patterns
+                    # CRITICAL: Extract ASIN directly from email redirect URLs
+                    # Pattern: dp%2F{ASIN}...fed_asin = ordered item (NOT recommendation)
+                    # Recommendations have AGH3Col or dealz_cs patterns
                 
-                found_asins = set()
+                    found_asins, plain_asins = set(), set()
                 
-                # Method 1: Look for ordered item pattern (fed_asin in ref) — most reliable
-                # URL-encoded: dp%2F{ASIN}%3Fref_%3D...fed_asin
-                for m in re.finditer(r'dp%2F([A-Z0-9]{10})%3F[^&]*fed_asin', raw_text, re.I):
-                    found_asins.add(m.group(1).upper())
+                    # Methods 1-3 in one sweep of the message:
+                    #   1/2: ordered-item links, URL-encoded dp%2F{ASIN}%3Fref_%3D...fed_asin / i_fed / t_fed — most reliable
+                    #   3: plain /dp/{ASIN}, only inside the order section and only if 1/2 found nothing
+                    section_end = raw_email.find(b'Continue shopping')
+                    if section_end < 0: section_end = len(raw_email) // 2
+                    for m in ORDER_ASIN_RE.finditer(raw_email):
+                        if m.group('enc'): found_asins.add(m.group('enc').decode('ascii').upper())
+                        elif m.end() <= section_end: plain_asins.add(m.group('plain').decode('ascii').upper())
+                    if not found_asins:
+                        found_asins = plain_asins
                 
-                # Method 2: Look for i_fed or t_fed patterns (image/text links to ordered item)
-                for m in re.finditer(r'dp%2F([A-Z0-9]{10})%3F[^&]*[it]_fed', raw_text, re.I):
-                    found_asins.add(m.group(1).upper())
+                    # Method 4: Decode URL-encoded links and find ASIN
+                    if not found_asins:
+                        decoded = unquote(raw_email.decode('utf-8', errors='ignore'))
+                        order_section = decoded.split('Continue shopping')[0] if 'Continue shopping' in decoded else decoded[:len(decoded)//2]
+                        for m in DP_ASIN_RE.finditer(order_section):
+                            found_asins.add(m.group(1).upper())
                 
-                # Method 3: Look for non-encoded dp/ pattern in order section only
-                if not found_asins:
-                    order_section = raw_text.split('Continue shopping')[0] if 'Continue shopping' in raw_text else raw_text[:len(raw_text)//2]
-                    for m in re.finditer(r'/dp/([A-Z0-9]{10})', order_section, re.I):
-                        found_asins.add(m.group(1).upper())
-                
-                # Method 4: Decode URL-encoded links and find ASIN
-                if not found_asins:
-                    decoded = unquote(raw_text)
-                    order_section = decoded.split('Continue shopping')[0] if 'Continue shopping' in decoded else decoded[:len(decoded)//2]
-                    for m in re.finditer(r'/dp/([A-Z0-9]{10})', order_section, re.I):
-                        found_asins.add(m.group(1).upper())
-                
-                if not found_asins:
-                    log(f"  ERROR: Could not extract ASIN from email")
-                    no_asin += 1
-                    continue
+                    if not found_asins:
+                        log(f"  ERROR: Could not extract ASIN from email")
+                        no_asin += 1
+                        continue
                 
-                log(f"  ASINs found: {len(found_asins)} — {', '.join(found_asins)}")
+                    log(f"  ASINs found: {len(found_asins)} — {', '.join(found_asins)}")
                 
-                # Extract quantity and item price
-                quantity = 1
-                item_price = None
+                    # Extract quantity and item price
+                    quantity = 1
+                    item_price = None
                 
-                qty_price_match = re.search(r'Quantity:\s*(\d+)\s+([\d.]+)\s*USD', plain_text)
-                if qty_price_match:
-                    quantity = int(qty_price_match.group(1))
-                    item_price = float(qty_price_match.group(2))
-                    log(f"  Quantity: {quantity}, Price: ${item_price}")
-                else:
-                    qty_match = re.search(r'Quantity:\s*(\d+)', plain_text)
-                    if qty_match:
-                        quantity = int(qty_match.group(1))
-                    
-                    # Only use price if single item (multi-item Grand Total is misleading)
-                    if len(found_asins) == 1:
-                        price_match = re.search(r'([\d.]+)\s*USD\s*Grand\s*Total', plain_text)
-                        if price_match:
-                            item_price = float(price_match.group(1))
+                    # One pass over the body collects every candidate; the priority order below is unchanged
+                    qty = qty_price = grand_total = None
+                    dollar_amounts = []
+                    for m in ORDER_AMOUNTS_RE.finditer(plain_text):
+                        if m.group('qty'):
+                            if qty is None: qty = m.group('qty')
+                            if qty_price is None and m.group('qty_price'): qty_price = (m.group('qty'), m.group('qty_price'))
+                        elif m.group('total'):
+                            if grand_total is None: grand_total = m.group('total')
                         else:
-                            price_matches = re.findall(r'\$\s*([\d.]+)', plain_text)
-                            for p in price_matches:
-                                try:
-                                    val = float(p)
-                                    if val > 0:
-                                        item_price = val
-                                        break
-                                except:
-                                    pass
-                    if item_price:
+                            dollar_amounts.append(m.group('dollar'))
+                
+                    if qty_price:
+                        quantity = int(qty_price[0])
+                        item_price = float(qty_price[1])
                         log(f"  Quantity: {quantity}, Price: ${item_price}")
+                    else:
+                        if qty:
+                            quantity = int(qty)
+                    
+                        # Only use price if single item (multi-item Grand Total is misleading)
+                        if len(found_asins) == 1:
+                            if grand_total:
+                                item_price = float(grand_total)
+                            else:
+                                for p in dollar_amounts:
+                                    try:
+                                        val = float(p)
+                                        if val > 0:
+                                            item_price = val
+                                            break
+                                    except:
+                                        pass
+                        if item_price:
+                            log(f"  Quantity: {quantity}, Price: ${item_price}")
                 
-                # Add each ASIN as a separate product
-                for asin in found_asins:
-                    orders_found += 1
-                    found_products.append({
-                        'asin': asin,
-                        'product_name': product_name or f"Order Item {asin}",
-                        'order_date': email_date,
-                        'order_id': order_id,
-                        'quantity': quantity,
-                        # Only assign price if single item (multi-item price is total, not per-item)
-                        'item_price': item_price if len(found_asins) == 1 else None
-                    })
-                    log(f"  SUCCESS: Added ASIN {asin}{'  (price omitted — multi-item order)' if len(found_asins) > 1 else ''}")
+                    # Add each ASIN as a separate product
+                    for asin in found_asins:
+                        orders_found += 1
+                        found_products.append({
+                            'asin': asin,
+                            'product_name': product_name or f"Order Item {asin}",
+                            'order_date': email_date,
+                            'order_id': order_id,
+                            'quantity': quantity,
+                            # Only assign price if single item (multi-item price is total, not per-item)
+                            'item_price': item_price if len(found_asins) == 1 else None
+                        })
+                        log(f"  SUCCESS: Added ASIN {asin}{'  (price omitted — multi-item order)' if len(found_asins) > 1 else ''}")
                         
-            except Exception as e:
-                log(f"  EXCEPTION: {str(e)}")
-                continue
+                except Exception as e:
+                    log(f"  EXCEPTION: {str(e)}")
+                    continue
         
-        log(f"\n{'='*60}")
-        log(f"IMPORT COMPLETE: {orders_found} orders, {duplicates} duplicates, {no_asin} missing ASINs")
-        log(f"{'='*60}\n")
+            # BODY.PEEK doesn't set \Seen; mark the order confirmations read as the full RFC822 fetch used to
+            for i in range(0, len(order_ids), IMAP_FETCH_BATCH):
+                try:
+                    mail.store(b','.join(order_ids[i:i + IMAP_FETCH_BATCH]), '+FLAGS', '\\Seen')
+                except imaplib.IMAP4.error as e:
+                    log(f"Could not mark order emails read: {e}")
+        
+            log(f"\n{'='*60}")
+            log(f"IMPORT COMPLETE: {orders_found} orders, {duplicates} duplicates, {no_asin} missing ASINs")
+            log(f"{'='*60}\n")
         
-        debug_info.append(f"Found={orders_found}")
-        if duplicates: debug_info.append(f"Dupes={duplicates}")
-        if no_asin: debug_info.append(f"NoASIN={no_asin}")
+            debug_info.append(f"Found={orders_found}")
+            if duplicates: debug_info.append(f"Dupes={duplicates}")
+            if no_asin: debug_info.append(f"NoASIN={no_asin}")
         
-        mail.close()
-        mail.logout()
+            mail.close()
         
     except imaplib.IMAP4.error as e:
         error_msg = str(e)
@@ -1588,24 +2057,42 @@ def scan_amazon_orders(email_address, email_password, days_back=32):
     
     return found_products, '; '.join(debug_info)
 
-async def scrape_with_playwright(asin):
+def lower_bytes(html):
+    """Lowercased page bytes for keyword checks; ASCII-only bytes.lower() is far cheaper than str.lower()."""
+    return (html if isinstance(html, bytes) else html.encode('utf-8', 'ignore')).lower()
+
+async def scrape_with_playwright(browser, asin):
+    """Scrape one ASIN in a fresh context on an already-running browser (see BrowserPool)."""
     result = {'new_price': None, 'used_price': None, 'title': None, 'screenshot_main': None, 'screenshot_offers': None, 'error': None}
     ss_dir = os.path.join(os.getcwd(), 'static', 'screenshots')
     ts = datetime.now().strftime('%Y%m%d_%H%M%S')
     
     # Clean up old screenshots for this ASIN (keep only 2 newest of each type)
+    # One directory scan for both types; names embed the timestamp, so they sort by age without a stat()
     try:
-        for prefix in [f'{asin}_main_', f'{asin}_offers_']:
-            existing = sorted([f for f in os.listdir(ss_dir) if f.startswith(prefix)], reverse=True)
-            for old_file in existing[2:]:  # Keep 2 most recent
+        buckets = {f'{asin}_main_': [], f'{asin}_offers_': []}
+        with os.scandir(ss_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(asin):
+                    for prefix, names in buckets.items():
+                        if entry.name.startswith(prefix):
+                            names.append(entry.name)
+                            break
+        for names in buckets.values():
+            for old_file in sorted(names, reverse=True)[2:]:  # Keep 2 most recent
                 os.remove(os.path.join(ss_dir, old_file))
     except: pass
     
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            ctx = await browser.new_context(viewport={'width': 1920, 'height': 1080}, user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36')
+        ctx = await browser.new_context(viewport={'width': 1920, 'height': 1080}, user_agent=BROWSER_UA)
+        try:
             page = await ctx.new_page()
+            offers_page = await ctx.new_page()
+            
+            # The offers page doesn't depend on the main page, so load both tabs at once
+            offers_url = f"https://www.amazon.com/gp/offer-listing/{asin}/ref=dp_olp_all_mbc?ie=UTF8&condition=all"
+            offers_load = asyncio.ensure_future(offers_page.goto(offers_url, timeout=40000, wait_until='domcontentloaded'))
+            offers_load.add_done_callback(lambda f: f.cancelled() or f.exception())  # Early returns never await it
             
             url = f"https://www.amazon.com/dp/{asin}"
             logger.info(f"[{asin}] Loading main page...")
@@ -1617,73 +2104,69 @@ async def scrape_with_playwright(asin):
             result['screenshot_main'] = ss_main
             
             html = await page.content()
-            soup = BeautifulSoup(html, 'html.parser')
+            tree = parse_html(html)
             
             # Detect bot/CAPTCHA blocks
-            page_text_check = html.lower()
-            if 'captcha' in page_text_check or 'robot' in page_text_check and 'are you a human' in page_text_check:
+            page_text_check = lower_bytes(html)
+            if b'captcha' in page_text_check or b'robot' in page_text_check and b'are you a human' in page_text_check:
                 result['error'] = 'Amazon bot detection triggered (CAPTCHA). Try again later.'
-                await browser.close()
                 return result
-            if soup.select_one('#captchacharacters'):
+            if tree.css_first('#captchacharacters'):
                 result['error'] = 'Amazon CAPTCHA page detected. Try again later.'
-                await browser.close()
                 return result
             
-            t = soup.select_one('#productTitle')
-            if t: result['title'] = t.get_text().strip()[:TITLE_MAX_LENGTH]
+            t = tree.css_first('#productTitle')
+            if t: result['title'] = t.text().strip()[:TITLE_MAX_LENGTH]
             
             for sel in ['#corePrice_feature_div .a-offscreen', '.reinventPricePriceToPayMargin .a-offscreen', '#priceblock_ourprice', '#priceblock_dealprice', '#apex_offerDisplay_desktop .a-offscreen']:
-                el = soup.select_one(sel)
+                el = tree.css_first(sel)
                 if el:
-                    pr = parse_price(el.get_text())
+                    pr = parse_price(el.text())
                     if pr:
                         result['new_price'] = pr
                         break
             
-            offers_url = f"https://www.amazon.com/gp/offer-listing/{asin}/ref=dp_olp_all_mbc?ie=UTF8&condition=all"
-            await page.goto(offers_url, timeout=40000, wait_until='domcontentloaded')
-            await page.wait_for_timeout(3000)
+            await offers_load
+            await offers_page.wait_for_timeout(3000)
             
             ss_offers = f"{asin}_offers_{ts}.png"
-            await page.screenshot(path=os.path.join(ss_dir, ss_offers), full_page=False)
+            await offers_page.screenshot(path=os.path.join(ss_dir, ss_offers), full_page=False)
             result['screenshot_offers'] = ss_offers
             
-            offers_html = await page.content()
-            offers_soup = BeautifulSoup(offers_html, 'html.parser')
+            offers_html = await offers_page.content()
+            offers_tree = parse_html(offers_html)
             
             used_prices = []
             new_prices_from_offers = []
             
-            pinned = offers_soup.select_one('#aod-pinned-offer')
+            pinned = offers_tree.css_first('#aod-pinned-offer')
             if pinned:
-                price_el = pinned.select_one('.a-price .a-offscreen')
-                condition_el = pinned.select_one('#aod-offer-heading')
+                price_el = pinned.css_first('.a-price .a-offscreen')
+                condition_el = pinned.css_first('#aod-offer-heading')
                 if price_el:
-                    pr = parse_price(price_el.get_text())
-                    condition_text = condition_el.get_text().lower() if condition_el else ''
+                    pr = parse_price(price_el.text())
+                    condition_text = condition_el.text().lower() if condition_el else ''
                     if pr:
                         if 'used' in condition_text or 'renewed' in condition_text:
                             used_prices.append(pr)
                         else:
                             new_prices_from_offers.append(pr)
             
-            for offer in offers_soup.select('#aod-offer-list #aod-offer'):
-                heading = offer.select_one('#aod-offer-heading')
-                heading_text = heading.get_text().lower().strip() if heading else ''
-                price_el = offer.select_one('.a-price .a-offscreen')
+            for offer in offers_tree.css('#aod-offer-list #aod-offer'):
+                heading = offer.css_first('#aod-offer-heading')
+                heading_text = heading.text().lower().strip() if heading else ''
+                price_el = offer.css_first('.a-price .a-offscreen')
                 if not price_el: continue
-                pr = parse_price(price_el.get_text())
+                pr = parse_price(price_el.text())
                 if not pr: continue
-                is_used = any(w in heading_text for w in ['used', 'renewed', 'refurbished', 'acceptable', 'good', 'very good', 'like new'])
-                if is_used:
+                if USED_CONDITION_RE.search(heading_text):
                     used_prices.append(pr)
                 elif 'new' in heading_text or heading_text == '':
                     new_prices_from_offers.append(pr)
             
-            page_text = await page.inner_text('body')
-            for pattern in [r'Used\s*\([^)]*\)\s*from\s*\$(\d+\.\d{2})', r'Used\s+from\s+\$(\d+\.\d{2})']:
-                for match in re.findall(pattern, page_text, re.I):
+            page_text = await offers_page.inner_text('body')
+            for pattern in USED_FROM_RES:
+                for match in pattern.findall(page_text):
                     price_str = match[-1] if isinstance(match, tuple) else match
                     try:
                         pr = float(price_str)
@@ -1697,8 +2180,8 @@ async def scrape_with_playwright(asin):
             
             if used_prices:
                 result['used_price'] = min(used_prices)
-            
-            await browser.close()
+        finally:
+            await ctx.close()
     except Exception as e:
         result['error'] = str(e)
         logger.error(f"[{asin}] Error: {e}")
@@ -1706,41 +2189,43 @@ async def scrape_with_playwright(asin):
     return result
 
 def scrape_with_requests(asin):
-    """Lightweight scraper using requests + BeautifulSoup. No browser needed.
+    """Lightweight scraper using requests + selectolax (BeautifulSoup fallback). No browser needed.
     Works in the EXE without any external installs. No screenshots."""
     result = {'new_price': None, 'used_price': None, 'title': None, 'screenshot_main': None, 'screenshot_offers': None, 'error': None}
     
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+    # Browser-like headers on top of the shared HTTP session defaults (pooled keep-alive connections)
+    headers = {
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
         'Accept-Language': 'en-US,en;q=0.9',
         'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
         'Upgrade-Insecure-Requests': '1',
-    })
+    }
     
     try:
+        # Offers page (used prices) is fetched alongside the main page on the HTTP pool
+        offers_url = f"https://www.amazon.com/gp/offer-listing/{asin}/ref=dp_olp_all_mbc?ie=UTF8&condition=all"
+        offers_future = http_executor.submit(HTTP.get, offers_url, headers=headers, timeout=30, allow_redirects=True)
+        
         # Main product page
         url = f"https://www.amazon.com/dp/{asin}"
-        logger.info(f"[{asin}] Fetching main page (requests)...")
-        resp = session.get(url, timeout=30, allow_redirects=True)
+        logger.info(f"[{asin}] Fetching main and offers pages (requests)...")
+        resp = HTTP.get(url, headers=headers, timeout=30, allow_redirects=True)
         resp.raise_for_status()
         html = resp.text
-        soup = BeautifulSoup(html, 'html.parser')
+        tree = parse_html(html)
         
         # Bot detection check
-        page_lower = html.lower()
-        if 'captcha' in page_lower or soup.select_one('#captchacharacters'):
+        page_lower = lower_bytes(resp.content)
+        if b'captcha' in page_lower or tree.css_first('#captchacharacters'):
             result['error'] = 'Amazon bot detection triggered (CAPTCHA). Try again later.'
             return result
-        if len(html) < 5000 and 'robot' in page_lower:
+        if len(html) < 5000 and b'robot' in page_lower:
             result['error'] = 'Amazon returned a minimal page (possible block). Try again later.'
             return result
         
         # Title
-        t = soup.select_one('#productTitle')
-        if t: result['title'] = t.get_text().strip()[:TITLE_MAX_LENGTH]
+        t = tree.css_first('#productTitle')
+        if t: result['title'] = t.text().strip()[:TITLE_MAX_LENGTH]
         
         # New price - try multiple selectors (Amazon changes these frequently)
         price_selectors = [
@@ -1755,17 +2240,17 @@ def scrape_with_requests(asin):
             '#newBuyBoxPrice',
         ]
         for sel in price_selectors:
-            el = soup.select_one(sel)
+            el = tree.css_first(sel)
             if el:
-                pr = parse_price(el.get_text())
+                pr = parse_price(el.text())
                 if pr:
                     result['new_price'] = pr
                     break
         
         # Regex fallback for new price if selectors missed
         if not result['new_price']:
-            for pattern in [r'"priceAmount":\s*(\d+\.?\d*)', r'\$(\d{1,5}\.\d{2})\s*</span>']:
-                m = re.search(pattern, html)
+            for pattern in NEW_PRICE_FALLBACK_RES:
+                m = pattern.search(html)
                 if m:
                     try:
                         pr = float(m.group(1))
@@ -1775,47 +2260,47 @@ def scrape_with_requests(asin):
                     except: pass
         
         # Offers page for used prices
-        import time as _time
-        _time.sleep(random.uniform(2, 4))  # Polite delay
-        offers_url = f"https://www.amazon.com/gp/offer-listing/{asin}/ref=dp_olp_all_mbc?ie=UTF8&condition=all"
-        logger.info(f"[{asin}] Fetching offers page (requests)...")
-        resp2 = session.get(offers_url, timeout=30, allow_redirects=True)
+        try:
+            resp2 = offers_future.result(timeout=OFFERS_TIMEOUT)
+        except FuturesTimeout:
+            offers_future.cancel()
+            logger.warning(f"[{asin}] Offers page timed out after {OFFERS_TIMEOUT}s, skipping used prices")
+            resp2 = None
         
-        if resp2.status_code == 200:
+        if resp2 is not None and resp2.status_code == 200:
             offers_html = resp2.text
-            offers_soup = BeautifulSoup(offers_html, 'html.parser')
+            offers_tree = parse_html(offers_html)
             used_prices = []
             new_prices_from_offers = []
             
-            pinned = offers_soup.select_one('#aod-pinned-offer')
+            pinned = offers_tree.css_first('#aod-pinned-offer')
             if pinned:
-                price_el = pinned.select_one('.a-price .a-offscreen')
-                condition_el = pinned.select_one('#aod-offer-heading')
+                price_el = pinned.css_first('.a-price .a-offscreen')
+                condition_el = pinned.css_first('#aod-offer-heading')
                 if price_el:
-                    pr = parse_price(price_el.get_text())
-                    condition_text = condition_el.get_text().lower() if condition_el else ''
+                    pr = parse_price(price_el.text())
+                    condition_text = condition_el.text().lower() if condition_el else ''
                     if pr:
                         if 'used' in condition_text or 'renewed' in condition_text:
                             used_prices.append(pr)
                         else:
                             new_prices_from_offers.append(pr)
             
-            for offer in offers_soup.select('#aod-offer-list #aod-offer'):
-                heading = offer.select_one('#aod-offer-heading')
-                heading_text = heading.get_text().lower().strip() if heading else ''
-                price_el = offer.select_one('.a-price .a-offscreen')
+            for offer in offers_tree.css('#aod-offer-list #aod-offer'):
+                heading = offer.css_first('#aod-offer-heading')
+                heading_text = heading.text().lower().strip() if heading else ''
+                price_el = offer.css_first('.a-price .a-offscreen')
                 if not price_el: continue
-                pr = parse_price(price_el.get_text())
+                pr = parse_price(price_el.text())
                 if not pr: continue
-                is_used = any(w in heading_text for w in ['used', 'renewed', 'refurbished', 'acceptable', 'good', 'very good', 'like new'])
-                if is_used:
+                if USED_CONDITION_RE.search(heading_text):
                     used_prices.append(pr)
                 elif 'new' in heading_text or heading_text == '':
                     new_prices_from_offers.append(pr)
             
             # Regex fallback for used prices
-            for pattern in [r'Used\s*\([^)]*\)\s*from\s*\$(\d+\.\d{2})', r'Used\s+from\s+\$(\d+\.\d{2})']:
-                for match in re.findall(pattern, offers_html, re.I):
+            for pattern in USED_FROM_RES:
+                for match in pattern.findall(offers_html):
                     price_str = match[-1] if isinstance(match, tuple) else match
                     try:
                         pr = float(price_str)
@@ -1840,17 +2325,65 @@ def scrape_with_requests(asin):
     
     return result
 
-def _playwright_available():
-    """Check if Playwright + Chromium are actually usable."""
-    # Try importing fresh — the EXE may have just installed it at startup
-    try:
-        from playwright.sync_api import sync_playwright
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            browser.close()
-        return True
-    except Exception:
-        return False
+class BrowserPool:
+    """One long-lived headless Chromium driven from a dedicated event-loop thread.
+    Scrapes from any thread share the browser process; each gets its own context."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._playwright = None
+        self._browser = None
+    
+    def start(self):
+        """Launch the browser if it isn't running. Returns True when Playwright + Chromium are usable."""
+        with self._lock:
+            if self._browser is not None and self._browser.is_connected():
+                return True
+            try:
+                if self._loop is None:
+                    self._loop = asyncio.new_event_loop()
+                    threading.Thread(target=self._loop.run_forever, name='playwright-loop', daemon=True).start()
+                asyncio.run_coroutine_threadsafe(self._launch(), self._loop).result(timeout=60)
+                return True
+            except Exception as e:
+                logger.warning(f"Playwright browser unavailable: {e}")
+                self._browser = None
+                return False
+    
+    async def _launch(self):
+        if self._playwright is None:
+            # Import fresh — the EXE may have just installed Playwright at startup
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+    
+    def scrape(self, asin):
+        """Run scrape_with_playwright on the shared browser and wait for its result."""
+        if not self.start():
+            raise RuntimeError("Playwright browser not available")
+        future = asyncio.run_coroutine_threadsafe(scrape_with_playwright(self._browser, asin), self._loop)
+        try:
+            return future.result(timeout=SCRAPE_TIMEOUT)
+        except FuturesTimeout:
+            future.cancel()  # Cancels the coroutine on the loop, which closes its context
+            raise
+    
+    def close(self):
+        """Shut down the browser and Playwright driver (registered with atexit)."""
+        if self._loop is None:
+            return
+        async def _shutdown():
+            if self._browser is not None: await self._browser.close()
+            if self._playwright is not None: await self._playwright.stop()
+        try:
+            asyncio.run_coroutine_threadsafe(_shutdown(), self._loop).result(timeout=10)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+BROWSER_POOL = BrowserPool()
+atexit.register(BROWSER_POOL.close)
 
 # Cache the check so we only do it once per session
 _pw_checked = None
@@ -1861,9 +2394,9 @@ def run_scraper(asin):
     EXE always works — Playwright is a bonus."""
     global _pw_checked
     
-    # Check Playwright availability once per session
+    # Check Playwright availability once per session (starts the shared browser)
     if _pw_checked is None:
-        _pw_checked = _playwright_available()
+        _pw_checked = BROWSER_POOL.start()
         if _pw_checked:
             logger.info("Scraper mode: Playwright (full screenshots + prices)")
         else:
@@ -1871,12 +2404,7 @@ def run_scraper(asin):
     
     if _pw_checked:
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                result = loop.run_until_complete(scrape_with_playwright(asin))
-            finally:
-                loop.close()
+            result = BROWSER_POOL.scrape(asin)
             # If Playwright succeeded, return its result
             if result.get('error') is None or result.get('new_price') or result.get('used_price'):
                 return result
@@ -1886,6 +2414,30 @@ def run_scraper(asin):
     # Fallback: requests-based scraper (always works)
     return scrape_with_requests(asin)
 
+def _scrape_politely(asin, delay_range):
+    """Scrape one ASIN on an amazon_executor worker, then pause before the worker takes the next one."""
+    if shutdown_requested.is_set():
+        return {'error': 'Shutdown requested'}
+    try:
+        return run_scraper(asin)
+    finally:
+        time.sleep(random.uniform(*delay_range))
+
+def scrape_many(asins, delay_range=(5, 10)):
+    """Scrape several ASINs on amazon_executor, at most AMAZON_CONCURRENCY at a time.
+    Yields one result dict per ASIN, in input order. Unstarted scrapes are cancelled if the caller stops early."""
+    futures = [amazon_executor.submit(_scrape_politely, asin, delay_range) for asin in asins]
+    try:
+        for asin, future in zip(asins, futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                logger.error(f"Error {asin}: {e}")
+                yield {'error': str(e)}
+    finally:
+        for future in futures:
+            future.cancel()
+
 # ============================================================
 # MULTI-SOURCE RECALL SCANNER (CPSC + openFDA)
 # ============================================================
@@ -1893,6 +2445,43 @@ def run_scraper(asin):
 CPSC_API_URL = "https://www.saferproducts.gov/RestWebServices/Recall"
 FDA_API_URL = "https://api.fda.gov"
 
+# Title/recall keyword extraction — run for every (product, recall) pair, so compiled once here
+TITLE_NOISE_RE = re.compile(r'\b(Loading|Order Item|B[0-9][A-Z0-9]{8})\b', re.I)
+TITLE_PUNCT_RE = re.compile(r'[,\-–—|/\\()\[\]{}]')
+TITLE_WS_RE = re.compile(r'\s+')
+HAS_LETTER_RE = re.compile(r'[a-zA-Z]')
+MODEL_CODE_RE = re.compile(r'^[A-Z0-9]{2,}$')
+LONG_WORD_RE = re.compile(r'\b[a-z]{4,}\b')
+SHORT_TOKEN_RE = re.compile(r'\b([a-zA-Z0-9]{2,3})\b')
+# Word lists for the same matching, as sets built once rather than literals rebuilt (or tuples scanned) per call
+# Common title words to skip (NOT brand names — amazon/basics/essentials removed to support Amazon Basics)
+TITLE_STOP_WORDS = frozenset({'the','a','an','and','or','for','with','in','on','of','to','by','from','is','it',
+                  'that','this','be','at','as','pack','set','count','piece','inch','inches','ft',
+                  'oz','lb','lbs','ml','size','color','new','edition','version','updated','latest',
+                  'prime','brand','item','best','seller','great',
+                  'value','premium','professional','ultra','super','pro','plus','max','mini','deluxe'})
+# Product-specific words (excluding very common ones)
+RECALL_GENERIC_WORDS = frozenset({'product','item','model','number','about','units','sold','stores',
+                     'between','through','from','were','with','that','this','have','been',
+                     'consumers','should','contact','company','free','replacement','refund',
+                     'risk','injury','hazard','recall','recalled','due','poses','posing',
+                     'also','each','made','make','more','most','much','only','over','some',
+                     'such','than','them','then','they','very','when','will','your','used',
+                     'like','does','just','into','back','after','could','would','which',
+                     'first','other','where','still','every','under','while','these','being',
+                     'there','those','might','comes','including','contains','found'})
+# Grammar words that don't count as product-specific 3-letter tokens even when capitalized
+SHORT_STOP_WORDS = frozenset({
+                'the','and','for','but','not','are','was','has','its','you','can','may','all',
+                'any','who','why','how','did','get','got','had','him','her','his','our','own',
+                'new','old','one','two','big','few','set','use','say','see','try','day','way',
+                'end','yet','now','let','put','run','cut','off','ask','add','men','per'})
+
+@functools.lru_cache(maxsize=1024)
+def brand_word_re(brand):
+    """Whole-word matcher for a brand, compiled once per brand instead of per (product, recall) pair."""
+    return re.compile(r'\b' + re.escape(brand) + r'\b')
+
 def extract_recall_keywords(title):
     """Extract meaningful search keywords from a product title for recall API lookups.
     Returns dict with 'brand', 'product_type', and 'queries' (list of (query_string, weight) tuples)."""
@@ -1900,18 +2489,11 @@ def extract_recall_keywords(title):
         return {'brand': '', 'product_type': '', 'queries': []}
     
     # Clean up title
-    clean = re.sub(r'\b(Loading|Order Item|B[0-9][A-Z0-9]{8})\b', '', title, flags=re.I)
-    clean = re.sub(r'[,\-–—|/\\()\[\]{}]', ' ', clean)
-    clean = re.sub(r'\s+', ' ', clean).strip()
-    
-    # Common words to skip (NOT brand names — amazon/basics/essentials removed to support Amazon Basics)
-    stop_words = {'the','a','an','and','or','for','with','in','on','of','to','by','from','is','it',
-                  'that','this','be','at','as','pack','set','count','piece','inch','inches','ft',
-                  'oz','lb','lbs','ml','size','color','new','edition','version','updated','latest',
-                  'prime','brand','item','best','seller','great',
-                  'value','premium','professional','ultra','super','pro','plus','max','mini','deluxe'}
+    clean = TITLE_NOISE_RE.sub('', title)
+    clean = TITLE_PUNCT_RE.sub(' ', clean)
+    clean = TITLE_WS_RE.sub(' ', clean).strip()
     
-    words = [w for w in clean.split() if w.lower() not in stop_words and len(w) > 1 and re.search(r'[a-zA-Z]', w)]
+    words = [w for w in clean.split() if w.lower() not in TITLE_STOP_WORDS and len(w) > 1 and HAS_LETTER_RE.search(w)]
     
     if not words:
         return {'brand': '', 'product_type': '', 'queries': []}
@@ -1921,7 +2503,7 @@ def extract_recall_keywords(title):
     
     # Product type = the core noun(s) describing what the product IS
     # Skip brand name, numbers, and short words to find the product type
-    type_words = [w for w in words[1:] if len(w) > 3 and not w[0].isdigit() and not re.match(r'^[A-Z0-9]{2,}$', w)]
+    type_words = [w for w in words[1:] if len(w) > 3 and not w[0].isdigit() and not MODEL_CODE_RE.match(w)]
     product_type = ' '.join(type_words[:3]) if type_words else ''
     
     queries = []
@@ -1956,28 +2538,15 @@ def score_recall_match(product_title, recall_data, source='cpsc'):
     # Also include 3-letter words that appear product-specific:
     #   - Contains a digit (D3, G65, etc.) 
     #   - Capitalized in original title (Pot, Gem, Pro, Max — product names, not grammar words)
-    base_words = set(re.findall(r'\b[a-z]{4,}\b', title_lower))
+    base_words = set(LONG_WORD_RE.findall(title_lower))
     # Add short product-specific words
-    for m in re.finditer(r'\b([a-zA-Z0-9]{2,3})\b', product_title):
+    for m in SHORT_TOKEN_RE.finditer(product_title):
         word = m.group(1)
         # Include if: contains digit, OR is capitalized (proper noun / product name)
-        if any(c.isdigit() for c in word) or (word[0].isupper() and word.lower() not in (
-                'the','and','for','but','not','are','was','has','its','you','can','may','all',
-                'any','who','why','how','did','get','got','had','him','her','his','our','own',
-                'new','old','one','two','big','few','set','use','say','see','try','day','way',
-                'end','yet','now','let','put','run','cut','off','ask','add','men','per')):
+        if any(c.isdigit() for c in word) or (word[0].isupper() and word.lower() not in SHORT_STOP_WORDS):
             base_words.add(word.lower())
     title_words = base_words
-    # Product-specific words (excluding very common ones)
-    generic_words = {'product','item','model','number','about','units','sold','stores',
-                     'between','through','from','were','with','that','this','have','been',
-                     'consumers','should','contact','company','free','replacement','refund',
-                     'risk','injury','hazard','recall','recalled','due','poses','posing',
-                     'also','each','made','make','more','most','much','only','over','some',
-                     'such','than','them','then','they','very','when','will','your','used',
-                     'like','does','just','into','back','after','could','would','which',
-                     'first','other','where','still','every','under','while','these','being',
-                     'there','those','might','comes','including','contains','found'}
+    generic_words = RECALL_GENERIC_WORDS
     product_words = title_words - generic_words
     # Remove brand word from product_words — brand match is scored separately
     # This prevents brand names like "amazon", "basics" from inflating the product type overlap
@@ -2000,7 +2569,7 @@ def score_recall_match(product_title, recall_data, source='cpsc'):
             recall_text_parts.append((mfg.get('Name', '') or '').lower())
         recall_text = ' '.join(recall_text_parts)
         
-        if brand and len(brand) >= 2 and re.search(r'\b' + re.escape(brand) + r'\b', recall_text):
+        if brand and len(brand) >= 2 and brand_word_re(brand).search(recall_text):
             brand_found = True
             score += 30
         
@@ -2014,16 +2583,12 @@ def score_recall_match(product_title, recall_data, source='cpsc'):
             prod_desc = (prod.get('Description', '') or '').lower()
             prod_combined = prod_name + ' ' + prod_desc
             # Same hybrid extraction as product title
-            prod_words = set(re.findall(r'\b[a-z]{4,}\b', prod_combined)) - generic_words
+            prod_words = set(LONG_WORD_RE.findall(prod_combined)) - generic_words
             # Include short capitalized/numeric words from original recall name
             orig_combined = (prod.get('Name', '') or '') + ' ' + (prod.get('Description', '') or '')
-            for m2 in re.finditer(r'\b([a-zA-Z0-9]{2,3})\b', orig_combined):
+            for m2 in SHORT_TOKEN_RE.finditer(orig_combined):
                 w = m2.group(1)
-                if any(c.isdigit() for c in w) or (w[0].isupper() and w.lower() not in (
-                    'the','and','for','but','not','are','was','has','its','you','can','may','all',
-                    'any','who','why','how','did','get','got','had','him','her','his','our','own',
-                    'new','old','one','two','big','few','set','use','say','see','try','day','way',
-                    'end','yet','now','let','put','run','cut','off','ask','add','men','per')):
+                if any(c.isdigit() for c in w) or (w[0].isupper() and w.lower() not in SHORT_STOP_WORDS):
                     prod_words.add(w.lower())
             prod_words -= generic_words
             
@@ -2046,7 +2611,7 @@ def score_recall_match(product_title, recall_data, source='cpsc'):
         
         # --- RECALL TITLE OVERLAP ---
         recall_title = (recall_data.get('Title', '') or '').lower()
-        recall_title_words = set(re.findall(r'\b[a-z]{4,}\b', recall_title)) - generic_words
+        recall_title_words = set(LONG_WORD_RE.findall(recall_title)) - generic_words
         title_overlap = product_words & recall_title_words
         if len(title_overlap) >= 2:
             score += min(len(title_overlap) * 8, 20)
@@ -2080,7 +2645,7 @@ def score_recall_match(product_title, recall_data, source='cpsc'):
         # 2. Brand is the FIRST significant word in the product description (actual brand position)
         # This prevents "unicorn" sweater matching "UNICORN BLOOD" supplement
         if brand and len(brand) >= 2:
-            brand_in_firm = bool(re.search(r'\b' + re.escape(brand) + r'\b', recalling_firm))
+            brand_in_firm = bool(brand_word_re(brand).search(recalling_firm))
             # Check if brand is leading word in product description (where brands actually appear)
             desc_first_words = product_desc.strip().split()[:3]  # First 3 words
             brand_leads_desc = any(brand == w.strip(',-()') for w in desc_first_words)
@@ -2090,15 +2655,11 @@ def score_recall_match(product_title, recall_data, source='cpsc'):
                 score += 30
         
         # Product type overlap with description — same hybrid extraction
-        desc_words = set(re.findall(r'\b[a-z]{4,}\b', product_desc)) - generic_words
+        desc_words = set(LONG_WORD_RE.findall(product_desc)) - generic_words
         orig_desc = recall_data.get('product_description', '') or ''
-        for m3 in re.finditer(r'\b([a-zA-Z0-9]{2,3})\b', orig_desc):
+        for m3 in SHORT_TOKEN_RE.finditer(orig_desc):
             w3 = m3.group(1)
-            if any(c.isdigit() for c in w3) or (w3[0].isupper() and w3.lower() not in (
-                'the','and','for','but','not','are','was','has','its','you','can','may','all',
-                'any','who','why','how','did','get','got','had','him','her','his','our','own',
-                'new','old','one','two','big','few','set','use','say','see','try','day','way',
-                'end','yet','now','let','put','run','cut','off','ask','add','men','per')):
+            if any(c.isdigit() for c in w3) or (w3[0].isupper() and w3.lower() not in SHORT_STOP_WORDS):
                 desc_words.add(w3.lower())
         desc_words -= generic_words
         overlap = product_words & desc_words
@@ -2107,7 +2668,7 @@ def score_recall_match(product_title, recall_data, source='cpsc'):
             score += min(len(overlap) * 12, 40)
         
         # Reason overlap (weak signal, capped)
-        reason_words = set(re.findall(r'\b[a-z]{4,}\b', reason)) - generic_words
+        reason_words = set(LONG_WORD_RE.findall(reason)) - generic_words
         reason_overlap = product_words & reason_words
         if reason_overlap:
             score += min(len(reason_overlap) * 3, 10)
@@ -2137,7 +2698,7 @@ def check_cpsc_recalls_for_product(product_title, min_score=55):
     for query, weight in keywords:
         try:
             params = {'format': 'json', 'ProductName': query}
-            resp = requests.get(CPSC_API_URL, params=params, timeout=15)
+            resp = HTTP.get(CPSC_API_URL, params=params, timeout=15)
             if resp.status_code != 200:
                 continue
             
@@ -2187,6 +2748,18 @@ def check_fda_recalls_for_product(product_title, min_score=55):
         f"{FDA_API_URL}/device/enforcement.json",
     ]
     
+    def fetch(endpoint, query, encoded_query):
+        try:
+            url = f"{endpoint}?search=product_description:{encoded_query}&limit=5"
+            resp = HTTP.get(url, timeout=15)
+            # openFDA returns 404 when no results found — that's normal, not an error
+            if resp.status_code != 200:
+                return []
+            return resp.json().get('results', [])
+        except Exception as e:
+            logger.warning(f"openFDA error for '{query}' at {endpoint}: {e}")
+            return []
+    
     best_match = None
     best_score = 0
     
@@ -2194,33 +2767,24 @@ def check_fda_recalls_for_product(product_title, min_score=55):
         # openFDA uses Elasticsearch syntax: spaces = OR, quotes = exact phrase
         encoded_query = quote(query)
         
-        for endpoint in fda_endpoints:
+        # The three endpoints are independent — query them concurrently, score in endpoint order
+        futures = [http_executor.submit(fetch, endpoint, query, encoded_query) for endpoint in fda_endpoints]
+        for endpoint, future in zip(fda_endpoints, futures):
             try:
-                url = f"{endpoint}?search=product_description:{encoded_query}&limit=5"
-                resp = requests.get(url, timeout=15)
-                
-                # openFDA returns 404 when no results found — that's normal, not an error
-                if resp.status_code == 404:
-                    continue
-                if resp.status_code != 200:
-                    continue
-                
-                data = resp.json()
-                results = data.get('results', [])
-                
-                for recall in results:
-                    score = score_recall_match(product_title, recall, source='fda')
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_match = recall
-                        best_match['_fda_endpoint'] = endpoint
-                
-                time.sleep(0.3)
-                
-            except Exception as e:
-                logger.warning(f"openFDA error for '{query}' at {endpoint}: {e}")
+                recalls = future.result(timeout=FDA_TIMEOUT)
+            except FuturesTimeout:
+                future.cancel()
+                logger.warning(f"openFDA timed out for '{query}' at {endpoint}")
                 continue
+            for recall in recalls:
+                score = score_recall_match(product_title, recall, source='fda')
+                
+                if score > best_score:
+                    best_score = score
+                    best_match = recall
+                    best_match['_fda_endpoint'] = endpoint
+        
+        time.sleep(0.3)
     
     if best_match and best_score >= min_score:
         return best_match
@@ -2271,17 +2835,7 @@ def normalize_fda_to_recall_data(fda_result):
 
 def run_recall_scan(products_to_check):
     """Scan CPSC + openFDA for recalls on a list of products. Returns dict of {product_id: recall_data}."""
-    log_file = os.path.join(os.getcwd(), 'recall_log.txt')
-    _rotate_log(log_file)
-    def log(msg):
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        line = f"[{timestamp}] {msg}"
-        logger.info(msg)
-        try:
-            with open(log_file, 'a') as f:
-                f.write(line + '\n')
-        except:
-            pass
+    log = activity_log('recall_log.txt')
     
     log("=" * 60)
     log("STARTING MULTI-SOURCE RECALL SCAN (Precision Mode)")
@@ -2373,14 +2927,50 @@ def apply_recall_to_product(product, recall_data):
     product.recall_consumer_contact = recall_data.get('recall_consumer_contact')
     product.last_recall_check = datetime.now()
 
+def mark_recalls_clean(session, product_ids):
+    """Record a no-match scan for these products in one UPDATE (matched/dismissed ones are left alone)."""
+    if not product_ids: return
+    session.query(Product).filter(
+        Product.id.in_(product_ids),
+        or_(Product.recall_status == None, Product.recall_status.notin_(('matched', 'dismissed')))
+    ).update({Product.recall_status: 'none', Product.last_recall_check: datetime.now()}, synchronize_session='evaluate')
+
 
 # ============================================================
 # FLASK APP
 # ============================================================
 
 app = Flask(__name__)
+# Named templates compile once on first use, minified so cached bytecode and responses carry the compact form
+app.jinja_env.loader = DictLoader({name: _minify_html(tpl) for name, tpl in {
+    'layout.html': LAYOUT_TPL,
+    'index.html': INDEX_TPL,
+    'product_card.html': PRODUCT_CARD_TPL,
+    'archive.html': ARCHIVE_TPL,
+    'settings.html': SETTINGS_TPL,
+    'recalls.html': RECALLS_TPL,
+}.items()})
+app.jinja_env.auto_reload = False
+app.jinja_env.cache_size = 1000  # Default LRU of 400 is plenty, but templates are constants — never evict
+app.config['TEMPLATES_AUTO_RELOAD'] = False  # Keeps --debug from re-enabling reload checks
+# Compiled template bytecode persists across restarts (per version; entries also key on the source hash)
+try:
+    _jinja_cache_dir = os.path.join(_app_dir, '.jinja_cache', f'v{APP_VERSION}')
+    os.makedirs(_jinja_cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(_jinja_cache_dir)
+except OSError: pass  # Read-only install dir — compile in memory as before
+app.jinja_env.globals['app_version'] = APP_VERSION
+# Compile every page at import so the first request after startup doesn't pay for it
+for _tpl_name in app.jinja_env.list_templates(): app.jinja_env.get_template(_tpl_name)
+
+if ORJSON_AVAILABLE:
+    from flask.json.provider import DefaultJSONProvider
+    class ORJSONProvider(DefaultJSONProvider):
+        """jsonify()/request.json through orjson"""
+        def dumps(self, obj, **kwargs): return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+        def loads(self, s, **kwargs): return orjson.loads(s)
+    app.json = ORJSONProvider(app)
 # Generate and persist a secret key for session security
-_app_dir = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.path.dirname(os.path.abspath(__file__))
 _secret_key_file = os.path.join(_app_dir, '.flask_secret')
 if os.path.exists(_secret_key_file):
     with open(_secret_key_file, 'r') as f: app.secret_key = f.read().strip()
@@ -2395,9 +2985,176 @@ next_run_time_global = None
 @app.route('/static/<path:f>')
 def static_files(f): return send_from_directory('static', f)
 
+STREAM_FLUSH_BYTES = 8192  # Gzip sync-flush granularity for streamed pages
+
+def _gzip_stream(chunks):
+    # Compress a streamed body on the fly, flushing every few KB so the browser can start rendering early
+    z, pending = zlib.compressobj(6, zlib.DEFLATED, 31), 0
+    for chunk in chunks:
+        if isinstance(chunk, str): chunk = chunk.encode()
+        out, pending = z.compress(chunk), pending + len(chunk)
+        if pending >= STREAM_FLUSH_BYTES:
+            out += z.flush(zlib.Z_SYNC_FLUSH); pending = 0
+        if out: yield out
+    yield z.flush()
+
+def stream_page(name, **ctx):
+    """Render a template as a streamed response: the header and first cards go out before the last card renders."""
+    get_flashed_messages(with_categories=True)  # Pop flashes now, while the session cookie can still be updated
+    app.update_template_context(ctx)
+    stream = app.jinja_env.get_template(name).stream(ctx)
+    stream.enable_buffering(32)
+    return app.response_class(stream_with_context(stream), mimetype='text/html')
+
+@app.after_request
+def compress_response(resp):
+    """Gzip HTML/JSON pages; the dashboard renders a form, chart and modal per product."""
+    if (resp.status_code != 200 or resp.direct_passthrough or 'Content-Encoding' in resp.headers
+            or resp.mimetype not in ('text/html', 'application/json')
+            or 'gzip' not in request.headers.get('Accept-Encoding', '')):
+        return resp
+    if resp.is_streamed:
+        resp.response = _gzip_stream(resp.response)
+        resp.headers.pop('Content-Length', None)
+        resp.headers['Content-Encoding'] = 'gzip'
+        resp.vary.add('Accept-Encoding')
+        return resp
+    data = resp.get_data()
+    if len(data) < 1024: return resp
+    resp.set_data(gzip.compress(data, compresslevel=6))
+    resp.headers['Content-Encoding'] = 'gzip'
+    resp.vary.add('Accept-Encoding')
+    return resp
+
+def static_asset(body, body_gz, mimetype):
+    # URL is versioned by content hash, so the browser can keep it forever
+    headers = {'Cache-Control': 'public, max-age=31536000, immutable', 'Vary': 'Accept-Encoding'}
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        headers['Content-Encoding'] = 'gzip'
+        return app.response_class(body_gz, mimetype=mimetype, headers=headers)
+    return app.response_class(body, mimetype=mimetype, headers=headers)
+
+@app.route('/app.css')
+def app_css():
+    return static_asset(LAYOUT_CSS, LAYOUT_CSS_GZ, 'text/css')
+
+@app.route('/app.js')
+def app_js():
+    return static_asset(LAYOUT_JS, LAYOUT_JS_GZ, 'application/javascript')
+
+def price_chart(history):
+    """Bar-chart data for a product card: one pass over the history instead of several in the template."""
+    chart = {'count': len(history), 'bars': [], 'has_used': False}
+    if len(history) < 2: return chart
+    prices = [v for h in history for v in (h.get('new'), h.get('used')) if v]
+    if not prices: return chart
+    minp, maxp = min(prices), max(prices)
+    rng = maxp - minp if maxp != minp else 1
+    chart['min_label'], chart['max_label'] = f"{minp:.0f}", f"{maxp:.0f}"
+    bars = chart['bars']
+    for h in history:
+        for kind, label in (('new', 'New'), ('used', 'Used')):
+            v = h.get(kind)
+            if v:
+                bars.append({'kind': kind, 'height': round(max((v - minp) / rng * 100, 8), 1), 'title': f"{h.get('date')}: {label} ${v:.2f}"})
+                if kind == 'used': chart['has_used'] = True
+    return chart
+
+def _money(v):
+    return f"{v:.2f}" if v else None
+
+def _drop(ref, cur):
+    # (percent, dollars) below the reference price, or None when not lower
+    if cur and ref and cur < ref:
+        return f"{(ref - cur) / ref * 100:.1f}", f"{ref - cur:.2f}"
+    return None
+
+def expiry_badge(p, now):
+    """(badge class, text) for the tracking-window countdown on a card."""
+    if not p.expires_at: return 'muted', 'No expiry'
+    days_left = (p.expires_at - now).days
+    if days_left <= 0: return 'danger', 'Expired'
+    return ('warning' if days_left <= 3 else 'info' if days_left <= 7 else 'muted'), f"{days_left}d left"
+
+_expiry_times_cache = {'generation': None, 'times': []}
+
+def expiry_slot(now):
+    """Latest time at or before `now` when an active card's expiry_badge ticked over (expires_at time of day)."""
+    generation = data_generation
+    if _expiry_times_cache['generation'] != generation:
+        with get_session() as s:
+            rows = s.query(Product.expires_at).filter(Product.is_archived == False, Product.expires_at != None).all()
+        _expiry_times_cache['times'] = sorted({r[0].time() for r in rows})
+        _expiry_times_cache['generation'] = generation
+    times = _expiry_times_cache['times']
+    if not times: return None
+    passed = [t for t in times if t <= now.time()]
+    if passed: return datetime.combine(now.date(), passed[-1])
+    return datetime.combine(now.date() - timedelta(days=1), times[-1])
+
+def recall_view(p):
+    """Everything the card's recall banner reads, with the long CPSC/FDA text already trimmed."""
+    if p.recall_status == 'matched':
+        return {'mode': 'matched', 'title': p.recall_title or 'Product recall detected',
+                'date': p.recall_date[:10] if p.recall_date else None,
+                'hazard': p.recall_hazard[:200] if p.recall_hazard else None,
+                'remedy': p.recall_remedy[:200] if p.recall_remedy else None, 'url': p.recall_url}
+    if p.recall_status == 'dismissed': return {'mode': 'dismissed'}
+    if p.last_recall_check: return {'mode': 'clean', 'checked': p.last_recall_check.strftime('%m/%d')}
+    return {'mode': None}
+
+def price_labels(p, now):
+    """Display strings for a product card, formatted once here rather than through Jinja filters."""
+    used_ref = p.highest_used_price or p.purchase_price
+    return {
+        'expiry': expiry_badge(p, now),
+        'new': _money(p.current_new_price), 'used': _money(p.current_used_price),
+        'low_new': _money(p.lowest_new_price), 'high_new': _money(p.highest_new_price),
+        'low_used': _money(p.lowest_used_price), 'high_used': _money(p.highest_used_price),
+        'purchase': _money(p.purchase_price),
+        'target': f"${p.target_price:.2f}" if p.target_price else 'Not set',
+        'new_drop': _drop(p.purchase_price, p.current_new_price),
+        'new_up': f"{(p.current_new_price - p.purchase_price) / p.purchase_price * 100:.1f}"
+                  if p.current_new_price and p.purchase_price and p.current_new_price > p.purchase_price else None,
+        'used_drop': _drop(used_ref, p.current_used_price),
+        'last_checked': p.last_checked.strftime('%m/%d %I:%M%p').lower() if p.last_checked else 'Never checked',
+        'recall': recall_view(p),
+        'archived': p.archived_at.strftime('%m/%d/%y') if p.archived_at else '',
+    }
+
+_stats_cache = {'key': None, 'stats': None}
+
+def dashboard_stats(products, now, generation):
+    """Stats-grid counts, reused until the next DB write or midnight (the sort only reorders the same products)."""
+    today = now.replace(hour=0,minute=0,second=0,microsecond=0)
+    key = (data_version(generation), today)
+    if _stats_cache['key'] == key: return _stats_cache['stats']
+    stats = {
+        'active': len(products),
+        'alerts_today': sum(1 for p in products if p.last_alert_sent and p.last_alert_sent >= today),
+        'at_target': sum(1 for p in products if p.target_price and ((p.current_new_price and p.current_new_price <= p.target_price) or (p.current_used_price and p.current_used_price <= p.target_price))),
+        'from_orders': sum(1 for p in products if p.source == 'email'),
+        'recalls': sum(1 for p in products if p.recall_status == 'matched')
+    }
+    _stats_cache['key'], _stats_cache['stats'] = key, stats
+    return stats
+
+def index_etag(sort):
+    """Changes with any DB write, the sort, the day, any expiry countdown ticking over, the schedule and available updates."""
+    now = datetime.now()
+    key = f"{data_version(data_generation)}|{sort}|{now:%Y%m%d}|{expiry_slot(now)}|{next_run_time_global}|{cached_update_info()[0]}|{LAYOUT_CSS_VERSION}|{LAYOUT_JS_VERSION}"
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
 @app.route('/')
 def index():
     sort = request.args.get('sort', 'newest')
+    # Pending flash messages are shown once, so only a flash-free page can be revalidated
+    etag = None if session.get('_flashes') else index_etag(sort)
+    if etag and request.if_none_match.contains(etag):
+        resp = app.response_class(status=304)
+        resp.set_etag(etag)
+        return resp
+    generation = data_generation  # Read before the query so a concurrent write can't be cached as already seen
     with get_session() as s:
         products = s.query(Product).filter_by(is_archived=False).all()
         
@@ -2434,32 +3191,34 @@ def index():
         
         settings = s.query(Settings).first()
         now = datetime.now()
-        today = now.replace(hour=0,minute=0,second=0,microsecond=0)
-        stats = {
-            'active': len(products),
-            'alerts_today': sum(1 for p in products if p.last_alert_sent and p.last_alert_sent >= today),
-            'at_target': sum(1 for p in products if p.target_price and ((p.current_new_price and p.current_new_price <= p.target_price) or (p.current_used_price and p.current_used_price <= p.target_price))),
-            'from_orders': sum(1 for p in products if p.source == 'email'),
-            'recalls': sum(1 for p in products if p.recall_status == 'matched')
-        }
+        stats = dashboard_stats(products, now, generation)
         last_run = max([p.last_checked for p in products if p.last_checked], default=None)
         email_configured = bool(settings.email_address and settings.email_password)
-        update_ver, update_url = check_for_updates()
-        return render_template_string(INDEX_TPL, products=products, settings=settings, stats=stats, 
+        update_ver, update_url = cached_update_info()
+        charts = {p.id: price_chart(p.get_price_history()) for p in products}
+        labels = {p.id: price_labels(p, now) for p in products}
+    # Everything the template needs is loaded above (expire_on_commit=False), so rendering can outlive the session
+    resp = stream_page('index.html', products=products, settings=settings, stats=stats, charts=charts, labels=labels,
             last_run_time=last_run.strftime("%m/%d %I:%M%p") if last_run else "Never",
             next_run_time=next_run_time_global.strftime("%I:%M%p") if next_run_time_global else None, 
             now=now, email_configured=email_configured, current_sort=sort,
             update_available=update_ver is not None, update_version=update_ver, update_url=update_url, current_version=APP_VERSION)
+    if etag:
+        resp.set_etag(etag)
+        resp.headers['Cache-Control'] = 'no-cache'  # Always revalidate; a 304 skips the whole render
+    return resp
 
 @app.route('/archive')
 def archive_page():
     with get_session() as s:
-        return render_template_string(ARCHIVE_TPL, products=s.query(Product).filter_by(is_archived=True).order_by(Product.archived_at.desc()).all(), now=datetime.now())
+        products = s.query(Product).filter_by(is_archived=True).order_by(Product.archived_at.desc()).all()
+        now = datetime.now()
+        return render_template('archive.html', products=products, labels={p.id: price_labels(p, now) for p in products}, now=now)
 
 @app.route('/api/save-email', methods=['POST'])
 def api_save_email():
     try:
-        data = request.get_json()
+        data = request.get_json()  # JSON content type only: cross-origin pages can't send it without a preflight
         with get_session() as s:
             st = s.query(Settings).first()
             if data.get('email'): st.email_address = data['email'].strip()
@@ -2577,18 +3336,7 @@ def api_product_settings(pid):
 
 @app.route('/api/check/<int:pid>', methods=['POST'])
 def api_check(pid):
-    # Log file for check operations
-    log_file = os.path.join(os.getcwd(), 'check_log.txt')
-    _rotate_log(log_file)
-    def log(msg):
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        line = f"[{timestamp}] {msg}"
-        logger.info(msg)
-        try:
-            with open(log_file, 'a') as f:
-                f.write(line + '\n')
-        except:
-            pass
+    log = activity_log('check_log.txt')
     
     try:
         with get_session() as s:
@@ -2625,7 +3373,10 @@ def api_check(pid):
                 if data.get('used_price'): parts.append(f"Used: ${data['used_price']:.2f}")
                 result_msg = ' | '.join(parts) if parts else 'No prices found'
                 log(f"CHECK COMPLETE: {asin} - {result_msg}")
-                return jsonify({'success': True, 'message': result_msg})
+                now = datetime.now()
+                html = render_template('product_card.html', p=p, settings=s.query(Settings).first(), now=now,
+                                       charts={p.id: price_chart(p.get_price_history())}, labels={p.id: price_labels(p, now)})
+                return jsonify({'success': True, 'message': result_msg, 'html': html})
         log(f"CHECK DB ERROR: {asin}")
         return jsonify({'success': False, 'error': 'DB error'})
     except Exception as e:
@@ -2653,8 +3404,8 @@ def api_test_email():
                         img = MIMEImage(f.read())
                         img.add_header('Content-Disposition', 'attachment', filename='screenshot.png')
                         msg.attach(img)
-            with smtplib.SMTP(st.smtp_server, st.smtp_port, timeout=30) as srv:
-                srv.starttls(); srv.login(st.email_address, st.email_password); srv.send_message(msg)
+            with smtp_connect(st) as srv:
+                srv.send_message(msg)
             return jsonify({'success': True})
     except smtplib.SMTPAuthenticationError: return jsonify({'success': False, 'error': 'Auth failed - check app password'})
     except Exception as e: return jsonify({'success': False, 'error': str(e)})
@@ -2681,12 +3432,7 @@ def api_scan_recalls():
                     apply_recall_to_product(prod, recall_data)
             
             # Mark checked products with no match
-            for prod_id, _, _ in to_check:
-                if prod_id not in results:
-                    prod = s.get(Product, prod_id)
-                    if prod and prod.recall_status not in ('matched', 'dismissed'):
-                        prod.recall_status = 'none'
-                        prod.last_recall_check = datetime.now()
+            mark_recalls_clean(s, [prod_id for prod_id, _, _ in to_check if prod_id not in results])
             
             # Update last scan time
             st = s.query(Settings).first()
@@ -2737,31 +3483,58 @@ def api_dismiss_recall(pid):
 def recalls_page():
     """Dedicated page showing all recall information (includes archived products)"""
     with get_session() as s:
-        matched = s.query(Product).filter_by(recall_status='matched').all()
-        dismissed = s.query(Product).filter_by(recall_status='dismissed').all()
+        # Just the columns the page shows (as lightweight Rows), both groups in one query
+        rows = s.query(Product.id, Product.title, Product.url, Product.is_archived, Product.recall_status,
+                       Product.recall_title, Product.recall_date, Product.recall_hazard, Product.recall_remedy,
+                       Product.recall_consumer_contact, Product.recall_url
+                       ).filter(Product.recall_status.in_(('matched', 'dismissed'))).all()
+        matched = [r for r in rows if r.recall_status == 'matched']
+        dismissed = [r for r in rows if r.recall_status == 'dismissed']
         st = s.query(Settings).first()
         total_products = s.query(Product).count()
-        return render_template_string(RECALLS_TPL, matched=matched, dismissed=dismissed, settings=st, now=datetime.now(), total_products=total_products)
+        return render_template('recalls.html', matched=matched, dismissed=dismissed, settings=st, now=datetime.now(), total_products=total_products)
 
 @app.route('/check-all', methods=['POST'])
 def check_all():
     with get_session() as s:
         products = s.query(Product).filter_by(is_archived=False, is_active=True).all()
         checked = 0
-        for prod in products:
+        for prod, data in zip(products, scrape_many([p.asin for p in products], delay_range=(4, 8))):
             try:
-                data = run_scraper(prod.asin)
                 if not data.get('error'):
                     prod.update_from_scrape(data)
                     checked += 1
-                    s.commit()
+                    if checked % CYCLE_COMMIT_EVERY == 0: s.commit()
             except Exception as e: logger.error(f"Error {prod.asin}: {e}")
-            time.sleep(random.uniform(4, 8))
         flash(f'Checked {checked}/{len(products)}', 'success')
     return redirect('/')
 
+_settings_page_cache = {'generation': None, 'html': None}
+
+# (value, label) choices for each <select> on the settings page, in display order
+SETTINGS_SELECTS = {
+    'auto_import': (('1', 'On'), ('0', 'Off')),
+    'import_frequency': (('every_6h', 'Every 6 hours'), ('every_12h', 'Every 12 hours'), ('daily', 'Once daily')),
+    'auto_archive': (('1', 'On'), ('0', 'Off')),
+    'global_alerts_enabled': (('0', 'Off'), ('1', 'On')),
+    'recall_scan_enabled': (('1', 'On'), ('0', 'Off')),
+    'recall_scan_frequency': (('every_check', 'Every price check'), ('daily', 'Daily'), ('weekly', 'Weekly')),
+    'batch_email_alerts': (('0', 'Off'), ('1', 'On')),
+    'run_at_startup': (('0', 'Off'), ('1', 'On')),
+}
+
+@functools.lru_cache(maxsize=64)
+def select_options(name, current):
+    """The <option> list for a settings select as ready-made HTML (a handful of possible values, so cached)."""
+    return Markup(''.join(f'<option value="{v}"{" selected" if v == current else ""}>{label}</option>'
+                          for v, label in SETTINGS_SELECTS[name]))
+
 @app.route('/settings', methods=['GET', 'POST'])
 def settings_page():
+    # A pure function of the settings row; pages carrying one-shot flashes aren't cached
+    generation, cacheable = data_generation, request.method == 'GET' and not session.get('_flashes')
+    if cacheable and _settings_page_cache['generation'] == generation:
+        return _settings_page_cache['html']
     with get_session() as s:
         st = s.query(Settings).first()
         if request.method == 'POST':
@@ -2787,10 +3560,20 @@ def settings_page():
                     _manage_startup_shortcut(new_startup)
                     st.run_at_startup = new_startup
             except: flash('Invalid values', 'error'); return redirect('/settings')
+            s.commit()
+            scheduler_wakeup.set()  # Apply a new check interval to the pending wait
             flash('Saved!', 'success'); return redirect('/settings')
         min_hours = (st.check_interval_minutes - INTERVAL_JITTER_MINUTES) / 60
         max_hours = (st.check_interval_minutes + INTERVAL_JITTER_MINUTES) / 60
-        return render_template_string(SETTINGS_TPL, settings=st, jitter=INTERVAL_JITTER_MINUTES, min_hours=f"{min_hours:.1f}", max_hours=f"{max_hours:.1f}")
+        toggles = {'auto_import': st.auto_import_orders, 'auto_archive': st.auto_archive, 'global_alerts_enabled': st.global_alerts_enabled,
+                   'recall_scan_enabled': st.recall_scan_enabled, 'batch_email_alerts': st.batch_email_alerts, 'run_at_startup': st.run_at_startup}
+        current = {k: '1' if v else '0' for k, v in toggles.items()}
+        current['import_frequency'] = st.import_frequency or 'every_12h'
+        current['recall_scan_frequency'] = st.recall_scan_frequency
+        options = {name: select_options(name, current[name]) for name in SETTINGS_SELECTS}
+        html = render_template('settings.html', settings=st, options=options, jitter=INTERVAL_JITTER_MINUTES, min_hours=f"{min_hours:.1f}", max_hours=f"{max_hours:.1f}")
+    if cacheable: _settings_page_cache['generation'], _settings_page_cache['html'] = generation, html
+    return html
 
 @app.route('/add', methods=['POST'])
 def add_product():
@@ -2865,22 +3648,46 @@ def clear_all():
         flash(f'Cleared {c} products', 'success')
     return redirect('/')
 
+def smtp_connect(settings):
+    """Open an authenticated SMTP session; caller closes it (use as a context manager)"""
+    srv = smtplib.SMTP(settings.smtp_server, settings.smtp_port, timeout=30)
+    try:
+        srv.starttls(); srv.login(settings.email_address, settings.email_password)
+    except:
+        srv.close(); raise
+    return srv
+
+def build_alert_email(subject, body, settings, screenshot_path=None):
+    msg = MIMEMultipart()
+    msg['Subject'] = subject
+    msg['From'] = settings.email_address
+    msg['To'] = settings.email_address
+    msg.attach(MIMEText(body, 'plain'))
+    if screenshot_path and os.path.exists(screenshot_path):
+        with open(screenshot_path, 'rb') as f:
+            img = MIMEImage(f.read())
+            img.add_header('Content-Disposition', 'attachment', filename='screenshot.png')
+            msg.attach(img)
+    return msg
+
+def send_alerts_batch(messages, settings):
+    """Send several messages over one SMTP session. Returns a sent flag per message."""
+    sent = [False] * len(messages)
+    if not messages or not settings.email_address or not settings.email_password: return sent
+    try:
+        with smtp_connect(settings) as srv:
+            for i, msg in enumerate(messages):
+                try:
+                    srv.send_message(msg); sent[i] = True
+                except smtplib.SMTPServerDisconnected: raise
+                except Exception as e: logger.error(f"Failed to send '{msg['Subject']}': {e}")
+    except Exception as e:
+        logger.error(f"SMTP session failed after {sum(sent)}/{len(messages)} emails: {e}")
+    return sent
+
 def send_alert_email(subject, body, settings, screenshot_path=None):
     if not settings.email_address or not settings.email_password: return False
-    try:
-        msg = MIMEMultipart()
-        msg['Subject'] = subject
-        msg['From'] = settings.email_address
-        msg['To'] = settings.email_address
-        msg.attach(MIMEText(body, 'plain'))
-        if screenshot_path and os.path.exists(screenshot_path):
-            with open(screenshot_path, 'rb') as f:
-                img = MIMEImage(f.read())
-                img.add_header('Content-Disposition', 'attachment', filename='screenshot.png')
-                msg.attach(img)
-        with smtplib.SMTP(settings.smtp_server, settings.smtp_port, timeout=30) as srv:
-            srv.starttls(); srv.login(settings.email_address, settings.email_password); srv.send_message(msg)
-        return True
+    try: return send_alerts_batch([build_alert_email(subject, body, settings, screenshot_path)], settings)[0]
     except: return False
 
 
@@ -2928,9 +3735,7 @@ def send_batched_alert_email(alerts_list, settings):
                         msg.attach(img)
                         screenshot_count += 1
         
-        with smtplib.SMTP(settings.smtp_server, settings.smtp_port, timeout=30) as srv:
-            srv.starttls()
-            srv.login(settings.email_address, settings.email_password)
+        with smtp_connect(settings) as srv:
             srv.send_message(msg)
         logger.info(f"Sent batched alert email with {len(alerts_list)} items, {screenshot_count} screenshots")
         return True
@@ -2984,9 +3789,7 @@ def send_recall_alert_email(recall_results, session, settings):
         
         msg.attach(MIMEText(''.join(body_parts), 'plain'))
         
-        with smtplib.SMTP(settings.smtp_server, settings.smtp_port, timeout=30) as srv:
-            srv.starttls()
-            srv.login(settings.email_address, settings.email_password)
+        with smtp_connect(settings) as srv:
             srv.send_message(msg)
         logger.info(f"Sent recall alert email for {len(recall_results)} products")
         return True
@@ -2995,9 +3798,11 @@ def send_recall_alert_email(recall_results, session, settings):
         return False
 
 shutdown_requested = threading.Event()
+scheduler_wakeup = threading.Event()  # Interrupts manager_loop's wait (shutdown, interval change)
 
 def run_cycle():
     batched_alerts = []  # Collect alerts for batch email
+    queued_emails = []  # (product, message) pairs sent over one SMTP session at the end
     
     with get_session() as s:
         st = s.query(Settings).first()
@@ -3022,7 +3827,7 @@ def run_cycle():
             else:
                 import_interval = timedelta(hours=12)
             
-            if not st.last_email_scan or datetime.now() - st.last_email_scan > import_interval:
+            if not st.last_email_scan or elapsed_since(st.last_email_scan) > import_interval:
                 try:
                     products, _ = scan_amazon_orders(st.email_address, st.email_password, days_back=7)
                     for prod in products:
@@ -3062,9 +3867,9 @@ def run_cycle():
             if st.recall_scan_frequency == 'every_check':
                 should_scan = True
             elif st.recall_scan_frequency == 'daily':
-                should_scan = not st.last_recall_scan or datetime.now() - st.last_recall_scan > timedelta(hours=24)
+                should_scan = not st.last_recall_scan or elapsed_since(st.last_recall_scan) > timedelta(hours=24)
             elif st.recall_scan_frequency == 'weekly':
-                should_scan = not st.last_recall_scan or datetime.now() - st.last_recall_scan > timedelta(days=7)
+                should_scan = not st.last_recall_scan or elapsed_since(st.last_recall_scan) > timedelta(days=7)
             
             if should_scan:
                 try:
@@ -3082,12 +3887,7 @@ def run_cycle():
                             if prod:
                                 apply_recall_to_product(prod, recall_data)
                         
-                        for prod_id, _, _ in to_check:
-                            if prod_id not in results:
-                                prod = s.get(Product, prod_id)
-                                if prod and prod.recall_status not in ('matched', 'dismissed'):
-                                    prod.recall_status = 'none'
-                                    prod.last_recall_check = datetime.now()
+                        mark_recalls_clean(s, [prod_id for prod_id, _, _ in to_check if prod_id not in results])
                         
                         if matches_found > 0:
                             send_recall_alert_email(results, s, st)
@@ -3106,12 +3906,13 @@ def run_cycle():
         if not products: return
         logger.info(f"Cycle: {len(products)} products (global alerts: {'ON' if use_global else 'OFF'})")
         
-        for prod in products:
+        updated = 0
+        for prod, data in zip(products, scrape_many([p.asin for p in products])):
             if shutdown_requested.is_set(): break
             try:
-                data = run_scraper(prod.asin)
                 if not data.get('error'):
                     prod.update_from_scrape(data)
+                    updated += 1
                     
                     # Check for alerts
                     alerts = []
@@ -3157,11 +3958,19 @@ def run_cycle():
                                 body += f"💰 You paid: ${prod.purchase_price:.2f}\n"
                             body += f"\n" + "\n".join(alerts) + f"\n\n🔗 {prod.url}"
                             ss_path = os.path.join('static', 'screenshots', prod.screenshot_main) if prod.screenshot_main else None
-                            if send_alert_email(f"📦 {prod.title[:40]}", body, st, ss_path): 
-                                prod.last_alert_sent = datetime.now()
-                    s.commit()
+                            if st.email_address and st.email_password:
+                                queued_emails.append((prod, build_alert_email(f"📦 {prod.title[:40]}", body, st, ss_path)))
+                    if updated % CYCLE_COMMIT_EVERY == 0: s.commit()
             except Exception as e: logger.error(f"Error {prod.asin}: {e}")
-            time.sleep(random.uniform(5, 10))
+        s.commit()
+        
+        # Flush individual alerts over a single connection
+        if queued_emails:
+            sent = send_alerts_batch([msg for _, msg in queued_emails], st)
+            for (prod, _), ok in zip(queued_emails, sent):
+                if ok: prod.last_alert_sent = datetime.now()
+            logger.info(f"Sent {sum(sent)}/{len(queued_emails)} alert emails")
+            s.commit()
         
         # Send batched email if any alerts collected
         if batched_alerts and batch_emails:
@@ -3169,23 +3978,49 @@ def run_cycle():
                 logger.info(f"Sent batched alert for {len(batched_alerts)} products")
             s.commit()
 
+def _check_interval_seconds():
+    with get_session() as s:
+        st = s.query(Settings).first()
+        return (st.check_interval_minutes if st else DEFAULT_INTERVAL_MINUTES) * 60
+
 def manager_loop():
     global next_run_time_global
     while not shutdown_requested.is_set():
         try: run_cycle()
         except Exception as e: logger.error(f"Cycle error: {e}")
-        with get_session() as s:
-            st = s.query(Settings).first()
-            base_interval = (st.check_interval_minutes if st else DEFAULT_INTERVAL_MINUTES) * 60
         jitter_seconds = random.uniform(-INTERVAL_JITTER_MINUTES * 60, INTERVAL_JITTER_MINUTES * 60)
-        wait = int(base_interval + jitter_seconds)
-        next_run_time_global = datetime.now() + timedelta(seconds=wait)
-        logger.info(f"Next check: {next_run_time_global.strftime('%I:%M%p')} ({wait//60}m)")
-        for _ in range(wait):
-            if shutdown_requested.is_set(): break
-            time.sleep(1)
+        cycle_done = time.monotonic()
+        base_interval = _check_interval_seconds()
+        rescheduled = True
+        while not shutdown_requested.is_set():
+            remaining = cycle_done + base_interval + jitter_seconds - time.monotonic()
+            if rescheduled:
+                next_run_time_global = datetime.now() + timedelta(seconds=max(remaining, 0))
+                logger.info(f"Next check: {next_run_time_global.strftime('%I:%M%p')} ({int(remaining)//60}m)")
+                rescheduled = False
+            if remaining <= 0: break
+            # Sleep until due; shutdown or an interval change wakes us at once.
+            # Capped so Ctrl+C in console mode on Windows (lock waits ignore signals) still lands within a minute.
+            if scheduler_wakeup.wait(min(remaining, 60)):
+                scheduler_wakeup.clear()
+                base_interval = _check_interval_seconds()
+                rescheduled = True
 
-def signal_handler(sig, frame): shutdown_requested.set()
+_tray_icon = None
+
+def request_shutdown():
+    """Single shutdown path for signals and tray Quit: stop scheduling, drop queued scrapes, leave the tray loop.
+    The browser pool and DB are closed by atexit once the main thread returns."""
+    shutdown_requested.set(); scheduler_wakeup.set()
+    executor.shutdown(wait=False, cancel_futures=True)
+    amazon_executor.shutdown(wait=False, cancel_futures=True)
+    http_executor.shutdown(wait=False, cancel_futures=True)
+    if _tray_icon is not None: _tray_icon.stop()
+
+def signal_handler(sig, frame):
+    shutdown_requested.set(); scheduler_wakeup.set()
+    # The rest takes locks the interrupted main thread may hold (executor submit), so run it off the handler
+    threading.Thread(target=request_shutdown, name='shutdown', daemon=True).start()
 
 def ensure_single_instance():
     """Prevent multiple instances. If another is running, try to kill it gracefully."""
@@ -3301,8 +4136,19 @@ def _manage_startup_shortcut(enable):
 # SYSTEM TRAY
 # ============================================================
 
+@functools.lru_cache(maxsize=1)
+def _tray_font():
+    try:
+        return ImageFont.truetype("arial.ttf", 22)
+    except:
+        try:
+            return ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 22)
+        except:
+            return ImageFont.load_default()
+
+@functools.lru_cache(maxsize=1)
 def create_tray_icon():
-    """Create the system tray icon — orange package box with $ and green arrow."""
+    """Create the system tray icon — orange package box with $ and green arrow. Rendered once."""
     size = 64
     img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
@@ -3317,13 +4163,7 @@ def create_tray_icon():
     # Center tape
     draw.rectangle([28, 10, 36, 58], fill=(230, 130, 0))
     # Dollar sign
-    try:
-        font = ImageFont.truetype("arial.ttf", 22)
-    except:
-        try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 22)
-        except:
-            font = ImageFont.load_default()
+    font = _tray_font()
     bbox = draw.textbbox((0, 0), "$", font=font)
     tw = bbox[2] - bbox[0]
     draw.text(((64 - tw) // 2 + 1, 26), "$", fill=(180, 90, 0), font=font)
@@ -3353,16 +4193,24 @@ def open_browser():
     logger.info(f"Opened browser: {url}")
 
 def quit_app(icon):
-    shutdown_requested.set()
-    icon.stop()
+    request_shutdown()
+
+def serve_app():
+    """Serve the dashboard: waitress worker pool, or the Flask dev server with --debug"""
+    if WAITRESS_AVAILABLE and '--debug' not in sys.argv:
+        waitress_serve(app, host='127.0.0.1', port=DEFAULT_PORT, threads=8, connection_limit=200, channel_timeout=60)
+    else:
+        if not WAITRESS_AVAILABLE: logger.info("Install waitress for a production web server")
+        app.run(host='127.0.0.1', port=DEFAULT_PORT, use_reloader=False, threaded=True, debug='--debug' in sys.argv)
 
 def run_with_tray():
+    global _tray_icon
     menu = Menu(
         MenuItem('Open Dashboard', lambda: open_browser()),
         MenuItem('Quit', quit_app)
     )
-    icon = Icon("Price Tracker", create_tray_icon(), "Amazon Price Tracker", menu)
-    flask_thread = threading.Thread(target=app.run, kwargs={'host': '127.0.0.1', 'port': DEFAULT_PORT, 'use_reloader': False, 'threaded': True}, daemon=True)
+    icon = _tray_icon = Icon("Price Tracker", create_tray_icon(), "Amazon Price Tracker", menu)
+    flask_thread = threading.Thread(target=serve_app, daemon=True)
     flask_thread.start()
     manager_thread = threading.Thread(target=manager_loop, daemon=True)
     manager_thread.start()
@@ -3371,7 +4219,7 @@ def run_with_tray():
     icon.run()
 
 def run_console():
-    threading.Thread(target=app.run, kwargs={'host': '127.0.0.1', 'port': DEFAULT_PORT, 'use_reloader': False, 'threaded': True}, daemon=True).start()
+    threading.Thread(target=serve_app, daemon=True).start()
     threading.Timer(1.0, open_browser).start()
     try: manager_loop()
     except KeyboardInterrupt: pass
@@ -3388,9 +4236,7 @@ if __name__ == "__main__":
     ensure_single_instance()
     os.makedirs('static/screenshots', exist_ok=True)
     init_db()
-    from jinja2 import DictLoader
-    app.jinja_env.loader = DictLoader({'layout': LAYOUT_TPL})
-    app.jinja_env.globals['app_version'] = APP_VERSION
+    cached_update_info()  # Start the GitHub check in the background so the first page load has it
     
     logger.info("="*50)
     logger.info(f"AMAZON PRICE TRACKER v{APP_VERSION}")
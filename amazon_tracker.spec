@@ -17,7 +17,13 @@ a = Analysis(
         'flask.json',
         'jinja2',
         'jinja2.ext',
+        'waitress',
+        'orjson',
+        'fast_mail_parser',
+        're2',
         'bs4',
+        'selectolax',
+        'selectolax.parser',
         'requests',
         'PIL',
         'PIL.Image',